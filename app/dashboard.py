@@ -8,8 +8,6 @@ import plotly.express as px
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
 
-from src.clustering import run_clustering
-
 # ----------------------------------------------------
 # CONFIG
 # ----------------------------------------------------
@@ -26,9 +24,34 @@ using Eurostat NUTS2 panel data.
 """)
 st.divider()
 
+@st.cache_data(show_spinner=False)
+def cached_clustering(df: pd.DataFrame) -> pd.DataFrame:
+    # Imported here so sessions only load sklearn once clustering is needed
+    from src.clustering import run_clustering
+
+    return run_clustering(df)
+
+
+@st.cache_data(show_spinner=False)
+def cached_cube(path: str, mtime: float):
+    # mtime is part of the cache key so a re-run of the pipeline is picked up
+    from src.evaluation import load_cube
+
+    return load_cube(path)
+
+
+@st.cache_data(show_spinner=False)
+def latest_ranking(path: str, mtime: float) -> pd.DataFrame:
+    preds = pd.read_csv(path)
+    latest_preds = preds[preds["year"] == preds["year"].max()]
+    return latest_preds.sort_values("y_pred_next_year", ascending=False)
+
+
 DATA_PATH = ROOT / "data" / "processed" / "regional_panel_features.csv"
 PRED_PATH = ROOT / "models" / "predictions.csv"
+FORECAST_PATH = ROOT / "models" / "forecast.csv"
 METRICS_PATH = ROOT / "models" / "metrics.json"
+CUBE_PATH = ROOT / "models" / "eval_cube.npz"
 GEO_PATH = ROOT / "data" / "geo" / "italy_nuts2.geojson"
 
 if not DATA_PATH.exists():
@@ -159,12 +182,52 @@ with tabs[1]:
             st.success("Best Performing Model")
             st.markdown(f"### {best_model}")
 
+    if CUBE_PATH.exists():
+        from src.evaluation import query_cube, residual_histogram
+
+        cube = cached_cube(str(CUBE_PATH), CUBE_PATH.stat().st_mtime)
+
+        st.divider()
+        st.subheader("Sliced Diagnostics")
+
+        dims = {"Region": "geo", "Year": "year", "Cluster": "cluster", "Horizon": "horizon"}
+        models = [m for m in cube.table["model"].cat.categories if m != "ALL"]
+
+        col1, col2 = st.columns(2)
+        with col1:
+            model_sel = st.selectbox("Model", models, key="cube_model")
+        with col2:
+            by_label = st.selectbox("Break down by", list(dims), key="cube_by")
+
+        sliced = query_cube(cube, by=[dims[by_label]], model=model_sel)
+        by_col = dims[by_label]
+        sliced = sliced[[by_col, "n", "bias", "MAE", "RMSE", "R2", "res_p10", "res_p50", "res_p90"]]
+
+        fig = px.bar(
+            sliced.astype({by_col: str}),
+            x=by_col,
+            y=["RMSE", "bias"],
+            barmode="group",
+            title=f"{model_sel}: error by {by_label.lower()}"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        approx = {c: f"{c} (approx.)" for c in ["res_p10", "res_p50", "res_p90"]}
+        st.dataframe(sliced.rename(columns=approx), use_container_width=True)
+        st.caption(
+            "Residual quantiles are interpolated from binned histograms, "
+            "not computed from the individual predictions."
+        )
+
+        hist = residual_histogram(cube, model=model_sel)
+        fig_hist = px.bar(hist, x="residual", y="count", title=f"{model_sel}: residual distribution")
+        st.plotly_chart(fig_hist, use_container_width=True)
+
 # ====================================================
 # STRUCTURAL ANALYSIS
 # ====================================================
 with tabs[2]:
 
-    cluster_df = run_clustering(df)
+    cluster_df = cached_clustering(df)
 
     st.subheader("Cluster Distribution")
     st.bar_chart(cluster_df["cluster"].value_counts())
@@ -185,10 +248,11 @@ with tabs[2]:
 # ====================================================
 with tabs[3]:
 
-    if PRED_PATH.exists():
-        preds = pd.read_csv(PRED_PATH)
-        latest_preds = preds[preds["year"] == preds["year"].max()]
-        ranked = latest_preds.sort_values("y_pred_next_year", ascending=False)
+    # forecast.csv (run_pipeline.py predict) holds true out-of-sample forecasts;
+    # fall back to the test-set predictions otherwise
+    if FORECAST_PATH.exists() or PRED_PATH.exists():
+        path = FORECAST_PATH if FORECAST_PATH.exists() else PRED_PATH
+        ranked = latest_ranking(str(path), path.stat().st_mtime)
 
         st.subheader("Predicted Next-Year Unemployment Ranking")
         st.dataframe(
@@ -0,0 +1,104 @@
+"""
+Ingestion throughput: JSON-stat vs streaming SDMX-CSV / bulk TSV.
+
+Builds the same synthetic dataset (freq x unit x geo x time) in the three
+Eurostat formats, then times parse + Italy NUTS2 filter for each backend.
+
+    python benchmarks/bench_ingest.py [--geos 1500] [--years 30]
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from src.eurostat_api import filter_italy_nuts2, jsonstat_to_df, sdmx_csv_to_df, tsv_to_df
+
+
+def _make_geos(n: int) -> list[str]:
+    # NUTS2-like codes: country prefix + two base-36 characters (unique up to 6 * 36**2)
+    countries = ["IT", "DE", "FR", "ES", "PL", "NL"]
+    digits = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    geos = []
+    for i in range(n):
+        k = i // len(countries)
+        geos.append(f"{countries[i % len(countries)]}{digits[k // 36 % 36]}{digits[k % 36]}")
+    return geos
+
+
+def build_fixtures(n_geo: int, n_years: int) -> tuple[bytes, bytes, bytes]:
+    units = ["PC", "THS"]
+    geos = _make_geos(n_geo)
+    years = [str(2000 + t) for t in range(n_years)]
+    rng = np.random.default_rng(0)
+    values = rng.uniform(1, 30, size=(len(units), len(geos), len(years))).round(1)
+
+    js = {
+        "id": ["freq", "unit", "geo", "time"],
+        "size": [1, len(units), len(geos), len(years)],
+        "dimension": {
+            "freq": {"category": {"index": {"A": 0}, "label": {"A": "Annual"}}},
+            "unit": {"category": {"index": {u: i for i, u in enumerate(units)}}},
+            "geo": {"category": {"index": {g: i for i, g in enumerate(geos)}}},
+            "time": {"category": {"index": {y: i for i, y in enumerate(years)}}},
+        },
+        "value": {str(i): float(v) for i, v in enumerate(values.ravel())},
+    }
+    js_bytes = json.dumps(js).encode()
+
+    csv_lines = ["DATAFLOW,LAST UPDATE,freq,unit,geo,TIME_PERIOD,OBS_VALUE,OBS_FLAG"]
+    tsv_lines = ["freq,unit,geo\\TIME_PERIOD\t" + "\t".join(f"{y} " for y in years)]
+    for u_i, u in enumerate(units):
+        for g_i, g in enumerate(geos):
+            row = values[u_i, g_i]
+            csv_lines += [f"ESTAT:X(1.0),01/01/24 23:00:00,A,{u},{g},{y},{v},b" for y, v in zip(years, row)]
+            tsv_lines.append(f"A,{u},{g}\t" + "\t".join(f"{v} b" for v in row))
+
+    csv_gz = gzip.compress("\n".join(csv_lines).encode())
+    tsv_gz = gzip.compress("\n".join(tsv_lines).encode())
+    return js_bytes, csv_gz, tsv_gz
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--geos", type=int, default=1500)
+    ap.add_argument("--years", type=int, default=30)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    js_bytes, csv_gz, tsv_gz = build_fixtures(args.geos, args.years)
+    n_obs = 2 * args.geos * args.years
+
+    runs = {
+        "jsonstat": (len(js_bytes), lambda: filter_italy_nuts2(jsonstat_to_df(json.loads(js_bytes)))),
+        "sdmx_csv": (len(csv_gz), lambda: sdmx_csv_to_df(io.BytesIO(csv_gz), row_filter=filter_italy_nuts2)),
+        "tsv": (len(tsv_gz), lambda: tsv_to_df(io.BytesIO(tsv_gz), row_filter=filter_italy_nuts2)),
+    }
+
+    print(f"{n_obs:,} observations")
+    print(f"{'backend':<10}{'payload':>12}{'seconds':>10}{'obs/s':>14}")
+    for name, (size, fn) in runs.items():
+        secs = _time(fn, args.repeat)
+        print(f"{name:<10}{size / 1e6:>10.2f}MB{secs:>10.3f}{n_obs / secs:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+CLI startup time: wall time of `run_pipeline.py` subcommands that should not
+load the ML stack, plus which heavy modules each one imports.
+
+    python benchmarks/bench_startup.py [--budget 1.0]
+
+Exits non-zero if any measured command or module import exceeds the budget
+(seconds) or imports a module it should not. tests/test_startup.py runs the
+same probes as part of the test suite.
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# command -> modules that must NOT be imported on that path
+CASES = {
+    "--help": ["pandas", "sklearn", "requests"],
+    "report --help": ["pandas", "sklearn", "requests"],
+    "fetch --help": ["pandas", "sklearn", "requests"],
+    "build --help": ["pandas", "sklearn", "requests"],
+    "report": ["pandas", "sklearn", "requests"],
+}
+
+# importing the data modules must not drag sklearn (or requests, only needed to download) in
+IMPORT_CASES = {
+    "src.build_dataset": ["sklearn", "requests"],
+    "src.eurostat_api": ["sklearn", "requests"],
+    "src.features": ["sklearn"],
+    "src.train_models": ["sklearn"],
+    "src.clustering": ["sklearn"],
+}
+
+_PROBE = """
+import runpy, sys
+sys.argv = ["run_pipeline.py"] + {argv!r}
+try:
+    runpy.run_path("run_pipeline.py", run_name="__main__")
+except SystemExit:
+    pass
+print("LOADED", " ".join(sorted(m for m in sys.modules if "." not in m)))
+"""
+
+_IMPORT_PROBE = """
+import sys
+import {module}
+print("LOADED", " ".join(sorted(m for m in sys.modules if "." not in m)))
+"""
+
+
+def _run(code: str, repeat: int) -> tuple[float, set[str]]:
+    best = float("inf")
+    loaded: set[str] = set()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        best = min(best, time.perf_counter() - t0)
+        line = [l for l in out.splitlines() if l.startswith("LOADED")][-1]
+        loaded = set(line.split()[1:])
+    return best, loaded
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--budget", type=float, default=1.0)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    baseline, _ = _run("pass\nprint('LOADED')", args.repeat)
+    print(f"{'case':<28}{'seconds':>10}  forbidden imports")
+    print(f"{'(python -c pass)':<28}{baseline:>10.3f}")
+
+    failed = False
+    runs = [(f"run_pipeline.py {c}", _PROBE.format(argv=c.split()), bad) for c, bad in CASES.items()]
+    runs += [(f"import {m}", _IMPORT_PROBE.format(module=m), bad) for m, bad in IMPORT_CASES.items()]
+    for label, code, forbidden in runs:
+        secs, loaded = _run(code, args.repeat)
+        hits = sorted(set(forbidden) & loaded)
+        if hits or secs > args.budget:
+            failed = True
+        print(f"{label:<28}{secs:>10.3f}  {', '.join(hits) or '-'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,304 @@
 from __future__ import annotations
 
+import argparse
+import json
 from pathlib import Path
-import pandas as pd
-
-from src.build_dataset import build_raw_tables, build_processed_dataset
-from src.features import add_features
-from src.train_models import train_time_aware
-from src.utils import ensure_dir
 
+# Only stdlib at module level: every subcommand imports pandas / sklearn / requests
+# itself, so `--help` and the data-only steps start without the ML stack.
 
 ROOT = Path(__file__).resolve().parent
 
-RAW_DIR = ensure_dir(ROOT / "data" / "raw")
-PROCESSED_DIR = ensure_dir(ROOT / "data" / "processed")
-MODELS_DIR = ensure_dir(ROOT / "models")
+RAW_DIR = ROOT / "data" / "raw"
+STORE_DIR = ROOT / "data" / "store"
+SNAPSHOT_DIR = ROOT / "data" / "snapshots"  # raw tables restored by build --as-of
+PROCESSED_DIR = ROOT / "data" / "processed"
+MODELS_DIR = ROOT / "models"
+
+PANEL_PATH = PROCESSED_DIR / "regional_panel.csv"
+FEATURES_PATH = PROCESSED_DIR / "regional_panel_features.csv"
+CUBE_PATH = MODELS_DIR / "eval_cube.npz"
+# Store vintage + run settings each processed artifact was built from (see cmd_refresh)
+SOURCES_PATH = PROCESSED_DIR / "sources.json"
+
+# Keep in sync with src.eurostat_api.BACKENDS and src.periods.FREQ_STEPS
+# (not imported to keep startup light)
+BACKENDS = ("jsonstat", "sdmx_csv", "tsv")
+FREQS = ("A", "Q", "M")
+
+
+def _source(args: argparse.Namespace, vintage: str | None) -> dict:
+    return {
+        "vintage": vintage,
+        "freq": args.freq,
+        "nuts": args.nuts,
+        "unemp_dataset": args.unemp_dataset,
+    }
+
+
+def _latest_vintage(args: argparse.Namespace) -> str | None:
+    from src.build_dataset import store_vintages
+
+    vintages = store_vintages(STORE_DIR, args.nuts, args.unemp_dataset)
+    return vintages[-1] if vintages else None
+
+
+def _read_sources() -> dict:
+    if not SOURCES_PATH.exists():
+        return {}
+    with open(SOURCES_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _record_source(artifact: str, source: dict | None) -> None:
+    sources = _read_sources()
+    sources[artifact] = source
+    SOURCES_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(SOURCES_PATH, "w", encoding="utf-8") as f:
+        json.dump(sources, f, indent=2)
+
 
+def _fetch(args: argparse.Namespace) -> dict:
+    from src.build_dataset import refresh_raw_tables
+    from src.store import summarize_delta
 
-def main() -> None:
-    print("1) Downloading raw data from Eurostat...")
-    build_raw_tables(RAW_DIR)
+    print(f"Downloading raw data from Eurostat ({args.backend})...")
+    deltas = refresh_raw_tables(
+        RAW_DIR, STORE_DIR, args.backend, args.freq, args.nuts, args.unemp_dataset
+    )
+    for code, counts in summarize_delta(deltas).items():
+        print(f"   [{code}] {counts['new']} new, {counts['revised']} revised observations")
+    return deltas
 
-    print("2) Building processed panel dataset...")
-    panel = build_processed_dataset(RAW_DIR, PROCESSED_DIR)
 
-    print("3) Creating features...")
-    feat = add_features(panel)
-    feat_path = PROCESSED_DIR / "regional_panel_features.csv"
-    feat.to_csv(feat_path, index=False)
+def cmd_fetch(args: argparse.Namespace) -> None:
+    _fetch(args)
 
-    print("4) Training models...")
-    _, metrics = train_time_aware(feat, MODELS_DIR)
+
+def cmd_build(args: argparse.Namespace) -> None:
+    from src.build_dataset import build_processed_dataset, materialize_raw_tables, store_vintages
+    from src.schema import report_memory
+
+    raw_dir = RAW_DIR
+    if args.as_of:
+        # Point-in-time raw tables go to their own directory; data/raw keeps the latest fetch
+        vintages = store_vintages(STORE_DIR, args.nuts, args.unemp_dataset, args.as_of)
+        if not vintages:
+            known = store_vintages(STORE_DIR, args.nuts, args.unemp_dataset)
+            raise SystemExit(
+                f"No vintage at or before {args.as_of}; "
+                f"available: {', '.join(known) or 'none (run fetch)'}"
+            )
+        vintage = vintages[-1]
+        raw_dir = SNAPSHOT_DIR / vintage.replace(":", "")
+        print(f"Restoring raw tables as of vintage {vintage} -> {raw_dir}...")
+        materialize_raw_tables(STORE_DIR, raw_dir, args.as_of, args.nuts, args.unemp_dataset)
+    else:
+        # data/raw holds the latest fetch, which is the store's latest vintage
+        vintage = _latest_vintage(args)
+
+    print("Building processed panel dataset...")
+    panel, _ = build_processed_dataset(raw_dir, PROCESSED_DIR, args.freq)
+    report_memory("panel", panel)
+    _record_source("panel", _source(args, vintage))
+
+
+def cmd_features(args: argparse.Namespace) -> None:
+    from src.features import add_features
+    from src.schema import PANEL_DTYPES, read_table, report_memory, write_table
+
+    print("Creating features...")
+    panel, labels = read_table(PANEL_PATH, PANEL_DTYPES)
+    feat = add_features(panel, args.freq)
+    report_memory("features", feat)
+    write_table(feat, FEATURES_PATH, labels)
+    _record_source("features", _read_sources().get("panel"))
+
+
+def cmd_train(args: argparse.Namespace) -> None:
+    from src.schema import FEATURE_DTYPES, read_table, report_memory
+    from src.train_models import train_time_aware
+
+    print("Training models...")
+    feat, labels = read_table(FEATURES_PATH, FEATURE_DTYPES)
+    preds, metrics = train_time_aware(feat, MODELS_DIR, labels, args.freq)
+    report_memory("predictions", preds)
+    _record_source("models", _read_sources().get("features"))
     print("Done. Metrics:")
     for m, vals in metrics.items():
         print(m, vals)
 
+
+def cmd_predict(args: argparse.Namespace) -> None:
+    from src.schema import FEATURE_DTYPES, read_table
+    from src.train_models import predict_next_year
+
+    print("Forecasting next year...")
+    feat, labels = read_table(FEATURES_PATH, FEATURE_DTYPES)
+    forecast = predict_next_year(feat, MODELS_DIR, labels, args.freq)
+    _record_source("forecast", _read_sources().get("features"))
+    print(f"Wrote {len(forecast)} forecasts to {MODELS_DIR / 'forecast.csv'}")
+
+
+def cmd_evaluate(args: argparse.Namespace) -> None:
+    from src.clustering import run_clustering
+    from src.evaluation import build_cube, query_cube, save_cube
+    from src.schema import FEATURE_DTYPES, PREDICTION_DTYPES, read_table
+
+    print("Building sliced evaluation cube...")
+    preds, _ = read_table(MODELS_DIR / "predictions.csv", PREDICTION_DTYPES)
+    feat, _ = read_table(FEATURES_PATH, FEATURE_DTYPES)
+    # cluster on the latest year that has both unemployment and GDP (GDP is published later)
+    complete = feat.dropna(subset=["unemp_rate", "gdp"])
+    clusters = run_clustering(complete).drop_duplicates("geo", keep="last").set_index("geo")["cluster"]
+
+    cube = build_cube(preds, clusters)
+    save_cube(cube, CUBE_PATH)
+    _record_source("cube", _read_sources().get("models"))
+    print(f"   {len(cube.table):,} slices -> {CUBE_PATH}")
+    print(query_cube(cube, by=["model"])[["model", "n", "bias", "MAE", "RMSE", "R2"]].to_string(index=False))
+
+
+def cmd_report(args: argparse.Namespace) -> None:
+    metrics_path = MODELS_DIR / "metrics.json"
+    if not metrics_path.exists():
+        raise SystemExit("No metrics found; run the train step first")
+    with open(metrics_path, encoding="utf-8") as f:
+        metrics = json.load(f)
+
+    print(f"{'model':<16}{'MAE':>8}{'RMSE':>8}{'R2':>8}")
+    for m, vals in sorted(metrics.items(), key=lambda kv: kv[1]["RMSE"]):
+        print(f"{m:<16}{vals['MAE']:>8.3f}{vals['RMSE']:>8.3f}{vals['R2']:>8.3f}")
+
     print("\nRun the dashboard:")
     print("  streamlit run app/dashboard.py")
 
 
+def _outputs_current(source: dict) -> bool:
+    """Every pipeline output exists and was built from source."""
+    outputs = {
+        "panel": PANEL_PATH,
+        "features": FEATURES_PATH,
+        "models": MODELS_DIR / "metrics.json",
+        "cube": CUBE_PATH,
+        "forecast": MODELS_DIR / "forecast.csv",
+    }
+    sources = _read_sources()
+    return all(path.exists() and sources.get(a) == source for a, path in outputs.items())
+
+
+def cmd_refresh(args: argparse.Namespace) -> None:
+    from src.build_dataset import affected_geos, build_processed_dataset
+    from src.features import update_features
+    from src.schema import FEATURE_DTYPES, read_table, report_memory, write_table
+
+    # Incremental updates only make sense on outputs of the store state before this fetch
+    current = _outputs_current(_source(args, _latest_vintage(args)))
+
+    print("1) ", end="")
+    geos = affected_geos(_fetch(args))
+    if not current:
+        print("Processed outputs are missing or not built from the latest vintage; rebuilding all...")
+        steps = [cmd_build, cmd_features, cmd_train, cmd_evaluate, cmd_predict, cmd_report]
+        for i, step in enumerate(steps, 2):
+            print(f"{i}) ", end="")
+            step(args)
+        return
+    if not geos:
+        print("No new or revised observations; nothing to recompute.")
+        return
+
+    source = _source(args, _latest_vintage(args))
+    print(f"2) Rebuilding panel ({len(geos)} regions changed)...")
+    panel, labels = build_processed_dataset(RAW_DIR, PROCESSED_DIR, args.freq)
+    _record_source("panel", source)
+
+    print("3) Updating features for changed regions...")
+    feat, _ = read_table(FEATURES_PATH, FEATURE_DTYPES)
+    feat = update_features(feat, panel, geos, args.freq)
+    report_memory("features", feat)
+    write_table(feat, FEATURES_PATH, labels)
+    _record_source("features", source)
+
+    # Models are fitted on the whole panel, so any change retrains them
+    for i, step in enumerate([cmd_train, cmd_evaluate, cmd_predict, cmd_report], 4):
+        print(f"{i}) ", end="")
+        step(args)
+
+
+def cmd_all(args: argparse.Namespace) -> None:
+    steps = [cmd_fetch, cmd_build, cmd_features, cmd_train, cmd_evaluate, cmd_predict, cmd_report]
+    for i, step in enumerate(steps, 1):
+        print(f"{i}) ", end="")
+        step(args)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="Italy regional labour forecast pipeline")
+    sub = ap.add_subparsers(dest="command", metavar="command")
+
+    # Data granularity, shared by every step (use the same values for a whole run)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--freq",
+        choices=FREQS,
+        default="A",
+        help="period frequency of the unemployment series (default: A)",
+    )
+    common.add_argument(
+        "--nuts",
+        type=int,
+        choices=(2, 3),
+        default=2,
+        help="NUTS level of the regions (default: 2)",
+    )
+    common.add_argument(
+        "--unemp-dataset",
+        metavar="CODE",
+        help="Eurostat unemployment dataset (default: tgs00010, annual NUTS2 only)",
+    )
+
+    def _add(name: str, func, help: str) -> argparse.ArgumentParser:
+        p = sub.add_parser(name, help=help, parents=[common])
+        p.set_defaults(func=func)
+        return p
+
+    for p in (
+        _add("fetch", cmd_fetch, "download raw tables from Eurostat"),
+        _add("refresh", cmd_refresh, "fetch and recompute only what new / revised data affects"),
+        _add("all", cmd_all, "run every step (default)"),
+    ):
+        p.add_argument(
+            "--backend",
+            choices=BACKENDS,
+            default="jsonstat",
+            help="Eurostat ingestion format (default: jsonstat)",
+        )
+    _add("build", cmd_build, "build the region x year panel from raw tables").add_argument(
+        "--as-of",
+        metavar="VINTAGE",
+        help="rebuild from the observation store as it was at this vintage (e.g. 2026-01-31, "
+        "a plain date meaning 00:00 UTC); "
+        "the raw snapshot goes to data/snapshots/, data/raw is left as is",
+    )
+    _add("features", cmd_features, "add lag / growth features to the panel")
+    _add("train", cmd_train, "train and evaluate models")
+    _add("evaluate", cmd_evaluate, "metrics per model x region x year x horizon x cluster")
+    _add("predict", cmd_predict, "forecast next year with the trained models")
+    _add("report", cmd_report, "print model metrics")
+
+    ap.set_defaults(
+        func=cmd_all, backend="jsonstat", as_of=None, freq="A", nuts=2, unemp_dataset=None
+    )
+    return ap
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    for d in (RAW_DIR, PROCESSED_DIR, MODELS_DIR):
+        d.mkdir(parents=True, exist_ok=True)
+    args.func(args)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
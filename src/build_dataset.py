@@ -1,107 +1,255 @@
 from __future__ import annotations
 
+from functools import partial
 from pathlib import Path
 import pandas as pd
 
 from .eurostat_api import (
     EurostatDataset,
-    fetch_jsonstat,
-    jsonstat_to_df,
-    filter_italy_nuts2,
+    fetch_dataset,
+    filter_italy_nuts,
     pick_first_available,
 )
+from .periods import parse_periods, period_year
+from .schema import PANEL_DTYPES, apply_schema, split_labels, union_categories, write_table
+from .store import (
+    VINTAGE_COL,
+    append_observations,
+    key_columns,
+    list_vintages,
+    new_vintage,
+    read_observations,
+)
 from .utils import ensure_dir
 
 
-def build_raw_tables(out_dir: str | Path) -> tuple[pd.DataFrame, pd.DataFrame]:
+# Raw table role -> file name
+RAW_TABLES = {
+    "unemployment": "unemployment_raw.csv",
+    "gdp": "gdp_raw.csv",
+}
+
+# Regional GDP per NUTS level (annual only; joined to sub-annual panels by year)
+GDP_DATASETS = {2: "nama_10r_2gdp", 3: "nama_10r_3gdp"}
+
+# Unemployment rate by NUTS2 region (annual). Eurostat does not publish quarterly
+# or NUTS3 unemployment, so those modes need another dataset code (unemp_code).
+DEFAULT_UNEMP_DATASET = "tgs00010"
+
+
+def dataset_codes(nuts_level: int = 2, unemp_code: str | None = None) -> dict[str, str]:
+    """Eurostat dataset code per raw table role."""
+    return {
+        "unemployment": unemp_code or DEFAULT_UNEMP_DATASET,
+        "gdp": GDP_DATASETS[nuts_level],
+    }
+
+
+# Preferred code per dimension when a dataset splits the observations further;
+# regional labour-force datasets break down by sex, age and education level.
+DEFAULT_CODES = {
+    "sex": ["T"],
+    "age": ["Y15-74", "Y_GE15", "Y15-64"],
+    "isced11": ["TOTAL"],
+}
+
+
+def _select_defaults(df: pd.DataFrame, preferred: dict[str, list[str]]) -> pd.DataFrame:
+    """
+    Narrow every dimension other than geo / time that still has several codes down to one
+    (preferred codes first, then DEFAULT_CODES, else the first available), so that
+    (geo, time) identifies an observation.
+    """
+    for dim in key_columns(df):
+        if dim in ("geo", "time") or df[dim].nunique() < 2:
+            continue
+        candidates = preferred.get(dim, []) + DEFAULT_CODES.get(dim, ["T", "TOTAL"])
+        code = pick_first_available(df, dim, candidates)
+        df = df[df[dim].astype(str) == code]
+    return df
+
+
+def _select_freq(df: pd.DataFrame, freq: str, code: str) -> pd.DataFrame:
+    # Unlike unit / na_item there is no sensible fallback: another frequency
+    # would silently be parsed as the wrong periods.
+    if "freq" not in df.columns:
+        return df
+    if freq not in set(df["freq"].astype(str)):
+        raise ValueError(f"{code} has no {freq!r} observations for the selected regions")
+    return df[df["freq"] == freq]
+
+
+def build_raw_tables(
+    out_dir: str | Path,
+    backend: str = "jsonstat",
+    freq: str = "A",
+    nuts_level: int = 2,
+    unemp_code: str | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Download the raw Eurostat tables and save them as CSV.
+    backend selects the ingestion path ("jsonstat", "sdmx_csv" or "tsv"); the streaming
+    backends drop non-Italian rows while parsing. freq ("A", "Q", "M") applies to the
+    unemployment table; GDP is always annual.
+    """
     out_dir = ensure_dir(out_dir)
+    codes = dataset_codes(nuts_level, unemp_code)
+    row_filter = partial(filter_italy_nuts, level=nuts_level)
 
-    # Unemployment rate by NUTS2 region (tgs00010)
+    # Unemployment rate by region
     unemp_ds = EurostatDataset(
-        code="tgs00010",
+        code=codes["unemployment"],
         params={
             "lang": "EN",
             "format": "JSON",
         },
+        backend=backend,
     )
-    unemp_js = fetch_jsonstat(unemp_ds.code, unemp_ds.params)
-    unemp_df = jsonstat_to_df(unemp_js)
-    unemp_df = filter_italy_nuts2(unemp_df, geo_col="geo")
-
-    # Some datasets contain multiple units/frequencies; select sensible defaults
-    if "freq" in unemp_df.columns:
-        freq = pick_first_available(unemp_df, "freq", ["A"])  # Annual preferred
-        if freq is not None:
-            unemp_df = unemp_df[unemp_df["freq"] == freq]
-    if "unit" in unemp_df.columns:
-        unit = pick_first_available(unemp_df, "unit", ["PC"])  # Percent preferred (if present)
-        if unit is not None:
-            unemp_df = unemp_df[unemp_df["unit"] == unit]
-
-    # GDP at current market prices by NUTS2 (nama_10r_2gdp)
+    unemp_df = fetch_dataset(unemp_ds, row_filter=row_filter)
+
+    # Some datasets contain multiple units/frequencies/breakdowns; select sensible defaults
+    unemp_df = _select_freq(unemp_df, freq, unemp_ds.code)
+    unemp_df = _select_defaults(unemp_df, {"unit": ["PC"]})  # Percent preferred (if present)
+
+    # GDP at current market prices by region (nama_10r_2gdp / nama_10r_3gdp)
     gdp_ds = EurostatDataset(
-        code="nama_10r_2gdp",
+        code=codes["gdp"],
         params={
             "lang": "EN",
             "format": "JSON",
         },
+        backend=backend,
     )
-    gdp_js = fetch_jsonstat(gdp_ds.code, gdp_ds.params)
-    gdp_df = jsonstat_to_df(gdp_js)
-    gdp_df = filter_italy_nuts2(gdp_df, geo_col="geo")
+    gdp_df = fetch_dataset(gdp_ds, row_filter=row_filter)
 
     # Prefer common GDP measure: na_item=B1GQ (GDP), unit=MIO_EUR if present
-    if "na_item" in gdp_df.columns:
-        na_item = pick_first_available(gdp_df, "na_item", ["B1GQ"])
-        if na_item is not None:
-            gdp_df = gdp_df[gdp_df["na_item"] == na_item]
-    if "unit" in gdp_df.columns:
-        unit = pick_first_available(gdp_df, "unit", ["MIO_EUR", "EUR_HAB"])
-        if unit is not None:
-            gdp_df = gdp_df[gdp_df["unit"] == unit]
-    if "freq" in gdp_df.columns:
-        freq = pick_first_available(gdp_df, "freq", ["A"])
-        if freq is not None:
-            gdp_df = gdp_df[gdp_df["freq"] == freq]
+    gdp_df = _select_freq(gdp_df, "A", gdp_ds.code)
+    gdp_df = _select_defaults(gdp_df, {"na_item": ["B1GQ"], "unit": ["MIO_EUR", "EUR_HAB"]})
 
     # Save raw
-    unemp_df.to_csv(Path(out_dir) / "unemployment_raw.csv", index=False)
-    gdp_df.to_csv(Path(out_dir) / "gdp_raw.csv", index=False)
+    unemp_df.to_csv(Path(out_dir) / RAW_TABLES["unemployment"], index=False)
+    gdp_df.to_csv(Path(out_dir) / RAW_TABLES["gdp"], index=False)
 
     return unemp_df, gdp_df
 
 
-def build_processed_dataset(raw_dir: str | Path, processed_dir: str | Path) -> pd.DataFrame:
+def refresh_raw_tables(
+    raw_dir: str | Path,
+    store_dir: str | Path,
+    backend: str = "jsonstat",
+    freq: str = "A",
+    nuts_level: int = 2,
+    unemp_code: str | None = None,
+) -> dict[str, pd.DataFrame]:
+    """
+    Fetch the raw tables and append new / revised observations to the observation store
+    under a single vintage. Returns the delta per dataset code (see store.append_observations).
+    """
+    vintage = new_vintage()
+    tables = build_raw_tables(raw_dir, backend, freq, nuts_level, unemp_code)
+    codes = dataset_codes(nuts_level, unemp_code)
+    return {
+        codes[role]: append_observations(store_dir, codes[role], df, vintage)
+        for role, df in zip(RAW_TABLES, tables)
+    }
+
+
+def store_vintages(
+    store_dir: str | Path,
+    nuts_level: int = 2,
+    unemp_code: str | None = None,
+    as_of: str | None = None,
+) -> list[str]:
+    """Vintages at which any of the configured datasets changed (at or before as_of), oldest first."""
+    codes = dataset_codes(nuts_level, unemp_code)
+    return sorted({v for code in codes.values() for v in list_vintages(store_dir, code, as_of)})
+
+
+def materialize_raw_tables(
+    store_dir: str | Path,
+    raw_dir: str | Path,
+    as_of: str | None = None,
+    nuts_level: int = 2,
+    unemp_code: str | None = None,
+) -> None:
+    """Write the raw tables as they were at vintage as_of (latest if None) from the store."""
+    raw_dir = ensure_dir(raw_dir)
+    codes = dataset_codes(nuts_level, unemp_code)
+    for role, file_name in RAW_TABLES.items():
+        code = codes[role]
+        df = read_observations(store_dir, code, as_of=as_of)
+        if df.empty:
+            available = ", ".join(list_vintages(store_dir, code)) or "none"
+            raise FileNotFoundError(
+                f"No observations for {code} in {store_dir} as of {as_of} (vintages: {available})"
+            )
+        df.drop(columns=VINTAGE_COL).to_csv(raw_dir / file_name, index=False)
+
+
+def affected_geos(deltas: dict[str, pd.DataFrame]) -> set[str]:
+    """Regions touched by new or revised observations."""
+    geos: set[str] = set()
+    for d in deltas.values():
+        if "geo" in d.columns:
+            geos.update(d["geo"].astype(str))
+    return geos
+
+
+def build_processed_dataset(
+    raw_dir: str | Path, processed_dir: str | Path, freq: str = "A"
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Build the region x period panel in the compact schema (see src/schema.py).
+    Unemployment periods of frequency freq are parsed once into integer period indices
+    (src/periods.py); annual GDP is joined on the period's year.
+    Returns (panel, labels); the CSV on disk keeps the region name column.
+    """
     raw_dir = Path(raw_dir)
     processed_dir = ensure_dir(processed_dir)
 
-    unemp = pd.read_csv(raw_dir / "unemployment_raw.csv")
-    gdp = pd.read_csv(raw_dir / "gdp_raw.csv")
+    raw_dtypes = {"geo": "category", "geo_name": "category", "time": "category", "value": "float64"}
+    unemp = pd.read_csv(raw_dir / RAW_TABLES["unemployment"], usecols=list(raw_dtypes), dtype=raw_dtypes)
+    gdp = pd.read_csv(raw_dir / RAW_TABLES["gdp"], usecols=list(raw_dtypes), dtype=raw_dtypes)
 
     # Normalize columns
     unemp = unemp.rename(
         columns={
-            "time": "year",
             "value": "unemp_rate",
             "geo_name": "region",
         }
     )
     gdp = gdp.rename(
         columns={
-            "time": "year",
             "value": "gdp",
             "geo_name": "region",
         }
     )
 
-    # Year to int where possible
-    unemp["year"] = pd.to_numeric(unemp["year"], errors="coerce").astype("Int64")
-    gdp["year"] = pd.to_numeric(gdp["year"], errors="coerce").astype("Int64")
+    # Period labels -> integer indices (unparseable labels become NaN and are dropped)
+    unemp["period"] = parse_periods(unemp["time"], freq)
+    unemp["year"] = period_year(unemp["period"], freq)
+    gdp["year"] = parse_periods(gdp["time"], "A")
 
     # Keep essentials
-    unemp = unemp[["geo", "region", "year", "unemp_rate"]].dropna(subset=["geo", "year"])
+    unemp = unemp[["geo", "region", "year", "period", "unemp_rate"]].dropna(subset=["geo", "period"])
     gdp = gdp[["geo", "region", "year", "gdp"]].dropna(subset=["geo", "year"])
 
+    # One observation per region and period, or lags / targets would pick an arbitrary duplicate
+    for name, frame, keys in (("unemployment", unemp, ["geo", "period"]), ("GDP", gdp, ["geo", "year"])):
+        dupes = frame.duplicated(keys)
+        if dupes.any():
+            raise ValueError(
+                f"{name} table has {int(dupes.sum())} duplicate ({', '.join(keys)}) rows; "
+                "the dataset has another dimension to select (see DEFAULT_CODES)"
+            )
+
+    # Region names go to a separate label table; frames keep categorical codes
+    unemp, labels = split_labels(unemp)
+    gdp, _ = split_labels(gdp)
+    unemp, gdp = union_categories([unemp, gdp], "geo")
+    unemp = apply_schema(unemp, PANEL_DTYPES)
+    gdp = apply_schema(gdp, PANEL_DTYPES)
+
     # Merge (left join keeps unemployment rows)
     df = unemp.merge(
         gdp[["geo", "year", "gdp"]],
@@ -110,8 +258,8 @@ def build_processed_dataset(raw_dir: str | Path, processed_dir: str | Path) -> p
     )
 
     # Basic cleaning
-    df = df.sort_values(["geo", "year"]).reset_index(drop=True)
+    df = apply_schema(df.sort_values(["geo", "period"]).reset_index(drop=True), PANEL_DTYPES)
 
     out_path = Path(processed_dir) / "regional_panel.csv"
-    df.to_csv(out_path, index=False)
-    return df
\ No newline at end of file
+    write_table(df, out_path, labels)
+    return df, labels
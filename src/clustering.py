@@ -1,6 +1,3 @@
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
 import pandas as pd
 
 
@@ -11,6 +8,10 @@ def run_clustering(df: pd.DataFrame) -> pd.DataFrame:
     using unemployment + GDP.
     Returns dataframe with cluster + PCA coordinates.
     """
+    # sklearn is only imported when clustering actually runs
+    from sklearn.cluster import KMeans
+    from sklearn.decomposition import PCA
+    from sklearn.preprocessing import StandardScaler
 
     latest_year = df["year"].max()
     latest = df[df["year"] == latest_year].copy()
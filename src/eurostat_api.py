@@ -1,20 +1,37 @@
 from __future__ import annotations
 
+import csv
+import gzip
+import io
 import re
+from contextlib import ExitStack, contextmanager
 from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, List, Tuple
 
+import numpy as np
 import pandas as pd
-import requests
+
+from .schema import categorize
 
 
 EUROSTAT_BASE = "https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data"
+EUROSTAT_SDMX_BASE = "https://ec.europa.eu/eurostat/api/dissemination/sdmx/2.1/data"
+
+# Ingestion backends selectable per dataset
+BACKENDS = ("jsonstat", "sdmx_csv", "tsv")
+
+# SDMX-CSV columns that are not dimensions of the observation
+_SDMX_META_COLS = {"DATAFLOW", "LAST UPDATE", "OBS_FLAG", "CONF_STATUS"}
+
+RowFilter = Callable[[pd.DataFrame], pd.DataFrame]
 
 
 @dataclass(frozen=True)
 class EurostatDataset:
     code: str
     params: Dict[str, str]
+    backend: str = "jsonstat"  # one of BACKENDS
 
 
 def _safe_get(d: Dict[str, Any], *keys: str) -> Any:
@@ -35,12 +52,23 @@ def fetch_jsonstat(dataset_code: str, params: Dict[str, str], timeout: int = 60)
     params.setdefault("format", "JSON")
     params.setdefault("lang", "EN")
 
+    # requests is only needed when downloading; build and build --as-of only read local files
+    import requests
+
     url = f"{EUROSTAT_BASE}/{dataset_code}"
     r = requests.get(url, params=params, timeout=timeout)
     r.raise_for_status()
     return r.json()
 
 
+def _name_column(idx: np.ndarray, codes: List[str], labels: Dict[str, str]) -> Any:
+    """Human labels (if available, else the code) for category positions idx."""
+    names = [labels.get(code, code) for code in codes]
+    if len(set(names)) == len(names):
+        return pd.Categorical.from_codes(idx, categories=names)
+    return np.asarray(names, dtype=object)[idx]
+
+
 def jsonstat_to_df(js: Dict[str, Any]) -> pd.DataFrame:
     """
     Convert Eurostat JSON-stat 2.0 to a tidy DataFrame with one row per observation.
@@ -77,6 +105,9 @@ def jsonstat_to_df(js: Dict[str, Any]) -> pd.DataFrame:
     else:
         value_map = {}
 
+    flat = np.fromiter(value_map.keys(), dtype=np.int64, count=len(value_map))
+    obs = np.fromiter(value_map.values(), dtype=np.float64, count=len(value_map))
+
     # Compute multipliers to decode flat index -> multidim coordinates
     multipliers: List[int] = []
     m = 1
@@ -85,41 +116,316 @@ def jsonstat_to_df(js: Dict[str, Any]) -> pd.DataFrame:
         m *= size
     multipliers = list(reversed(multipliers))
 
-    rows: List[Dict[str, Any]] = []
-    for flat_i, v in value_map.items():
-        coords: List[int] = []
-        remainder = flat_i
-        for size, mult in zip(dim_sizes, multipliers):
-            idx = remainder // mult
-            remainder = remainder % mult
-            # safety clamp
-            if idx >= size:
-                idx = size - 1
-            coords.append(idx)
-
-        row: Dict[str, Any] = {}
-        for dim, idx, codes, labels in zip(dim_ids, coords, dim_codes, dim_labels):
-            code = codes[idx]
-            row[dim] = code
-            # human label (if available)
-            row[f"{dim}_name"] = labels.get(code, code)
-        row["value"] = v
-        rows.append(row)
-
-    return pd.DataFrame(rows)
+    # Decode all observations at once; each dimension becomes a categorical
+    # (positions as codes), so codes and labels are stored once per category.
+    out: Dict[str, Any] = {}
+    remainder = flat
+    for dim, size, mult, codes, labels in zip(dim_ids, dim_sizes, multipliers, dim_codes, dim_labels):
+        idx = np.minimum(remainder // mult, size - 1)  # safety clamp
+        remainder = remainder % mult
 
+        out[dim] = pd.Categorical.from_codes(idx, categories=codes)
+        out[f"{dim}_name"] = _name_column(idx, codes, labels)
+    out["value"] = obs
 
-def filter_italy_nuts2(df: pd.DataFrame, geo_col: str = "geo") -> pd.DataFrame:
+    return pd.DataFrame(out)
+
+
+@contextmanager
+def _open_source(source: str | Path | IO[bytes]) -> Iterator[IO[str]]:
     """
-    Keep Italy NUTS2 regions.
-    Empirically, NUTS2 codes are length 4, start with 'IT' (e.g., ITC1, ITF3).
+    Text stream over a local SDMX-CSV / TSV file (plain or .gz) or an already open binary stream.
+    Gzip payloads are detected from the magic bytes, not the file name.
+    Only what is opened here is closed on exit; a stream passed in is left open.
+    """
+    with ExitStack() as stack:
+        if isinstance(source, (str, Path)):
+            handle: IO[bytes] = stack.enter_context(open(source, "rb"))
+        else:
+            handle = source
+        if hasattr(handle, "peek"):
+            buffered = handle
+        else:
+            buffered = io.BufferedReader(handle)
+            stack.callback(buffered.detach)  # closing the wrapper would close the caller's stream
+        if buffered.peek(2)[:2] == b"\x1f\x8b":
+            buffered = stack.enter_context(gzip.GzipFile(fileobj=buffered))
+        text = io.TextIOWrapper(buffered, encoding="utf-8", newline="")
+        stack.callback(text.detach)
+        yield text
+
+
+@contextmanager
+def _stream_remote(dataset_code: str, params: Dict[str, str], timeout: int) -> Iterator[IO[bytes]]:
+    """
+    Open a streaming response from the Eurostat SDMX 2.1 API; the connection is released on exit.
+    The body is the gzip file itself (compressed=true); it is decompressed lazily by _open_source.
+    """
+    params = dict(params)
+    params.setdefault("compressed", "true")
+
+    import requests
+
+    url = f"{EUROSTAT_SDMX_BASE}/{dataset_code}"
+    with requests.get(url, params=params, timeout=timeout, stream=True) as r:
+        r.raise_for_status()
+        r.raw.decode_content = True  # undo any transport-level encoding only
+        yield r.raw
+
+
+def _split_code_label(s: pd.Series) -> Tuple[pd.Categorical, pd.Categorical]:
+    """
+    Split a categorical column of "CODE: Label" cells (SDMX-CSV with labels=both) into code and label.
+    Only the distinct categories are split, then expanded by the category codes, so both
+    results stay categorical. Cells without a label keep the code as label, like jsonstat_to_df does.
+    """
+    parts = s.cat.categories.to_series().str.partition(": ")
+    labels = parts[2].where(parts[1] != "", parts[0])
+    pos = s.cat.codes.to_numpy()
+
+    def _expand(per_category: pd.Series) -> pd.Categorical:
+        codes, uniques = pd.factorize(per_category)
+        return pd.Categorical.from_codes(codes[pos], categories=uniques)
+
+    return _expand(parts[0]), _expand(labels)
+
+
+def _tidy_columns(dims: List[str]) -> List[str]:
+    cols: List[str] = []
+    for dim in dims:
+        cols += [dim, f"{dim}_name"]
+    return cols + ["value"]
+
+
+def _concat_chunks(chunks: Iterator[pd.DataFrame], dims: List[str]) -> pd.DataFrame:
+    cols = _tidy_columns(dims)
+    parts = [c for c in chunks if len(c)]
+    if not parts:
+        return categorize(pd.DataFrame(columns=cols), cols[:-1])
+    # chunks carry different categories, so categorize once after concatenation
+    return categorize(pd.concat(parts, ignore_index=True), cols[:-1])
+
+
+def sdmx_csv_to_df(
+    source: str | Path | IO[bytes],
+    row_filter: RowFilter | None = None,
+    chunksize: int = 100_000,
+) -> pd.DataFrame:
+    """
+    Parse an SDMX-CSV file (optionally gzip-compressed) into the same tidy frame as jsonstat_to_df.
+    The file is read in chunks with typed columns; row_filter is applied to every chunk
+    (on code columns) so rows that are not needed are dropped before they accumulate.
+    """
+    with _open_source(source) as text:
+        return _sdmx_csv_frame(text, row_filter, chunksize)
+
+
+def _sdmx_csv_frame(text: IO[str], row_filter: RowFilter | None, chunksize: int) -> pd.DataFrame:
+    header = next(csv.reader([text.readline()]))
+    # labels=both also labels the header ("geo: Geopolitical entity")
+    header = [h.split(":", 1)[0].strip() for h in header]
+
+    dims = [h for h in header if h not in _SDMX_META_COLS and h != "OBS_VALUE"]
+    usecols = dims + ["OBS_VALUE"]
+    dtypes: Dict[str, Any] = {d: "category" for d in dims}
+    dtypes["OBS_VALUE"] = "float64"
+
+    reader = pd.read_csv(
+        text,
+        header=None,
+        names=header,
+        usecols=usecols,
+        dtype=dtypes,
+        keep_default_na=False,
+        na_values={"OBS_VALUE": ["", ":"]},
+        chunksize=chunksize,
+    )
+    out_dims = ["time" if d == "TIME_PERIOD" else d for d in dims]
+
+    def _chunks() -> Iterator[pd.DataFrame]:
+        for chunk in reader:
+            chunk = chunk.dropna(subset=["OBS_VALUE"])
+            if chunk.empty:
+                continue
+            split = {out_dim: _split_code_label(chunk[dim]) for dim, out_dim in zip(dims, out_dims)}
+            # filter on the categorical codes first; labels are only expanded for kept rows
+            keys = pd.DataFrame({d: code for d, (code, _) in split.items()}, index=chunk.index)
+            if row_filter is not None:
+                keys = row_filter(keys)
+                if keys.empty:
+                    continue
+            rows = chunk.index.get_indexer(keys.index)
+            out: Dict[str, Any] = {}
+            for d, (_, label) in split.items():
+                out[d] = keys[d].array
+                out[f"{d}_name"] = label.take(rows)
+            out["value"] = chunk["OBS_VALUE"].to_numpy()[rows]
+            yield pd.DataFrame(out, index=keys.index)
+
+    return _concat_chunks(_chunks(), out_dims)
+
+
+def tsv_to_df(
+    source: str | Path | IO[bytes],
+    row_filter: RowFilter | None = None,
+    chunksize: int = 20_000,
+) -> pd.DataFrame:
+    """
+    Parse a Eurostat bulk TSV file (optionally gzip-compressed) into the same tidy frame as jsonstat_to_df.
+    The wide layout (one row per series, one column per period) is filtered per chunk before being
+    melted, so rows dropped by row_filter never get expanded. Flags ("10.2 b") and ":" are stripped.
+    TSV has no labels, so *_name columns repeat the codes (fetch_tsv fills them in, see apply_labels).
+    """
+    with _open_source(source) as text:
+        return _tsv_frame(text, row_filter, chunksize)
+
+
+def _tsv_frame(text: IO[str], row_filter: RowFilter | None, chunksize: int) -> pd.DataFrame:
+    header = text.readline().rstrip("\r\n").split("\t")
+    key_col, periods = header[0], [p.strip() for p in header[1:]]
+    dim_part, time_dim = key_col.split("\\", 1) if "\\" in key_col else (key_col, "TIME_PERIOD")
+    dims = [d.strip() for d in dim_part.split(",")]
+    time_name = "time" if time_dim.strip() in ("TIME_PERIOD", "time") else time_dim.strip()
+
+    reader = pd.read_csv(
+        text,
+        sep="\t",
+        header=None,
+        names=["_key"] + periods,
+        dtype=str,
+        keep_default_na=False,
+        chunksize=chunksize,
+    )
+    out_dims = dims + [time_name]
+
+    def _chunks() -> Iterator[pd.DataFrame]:
+        for chunk in reader:
+            keys = chunk["_key"].str.split(",", expand=True)
+            wide = pd.DataFrame({d: keys[i] for i, d in enumerate(dims)}, index=chunk.index)
+            if row_filter is not None:
+                wide = row_filter(wide)
+            if wide.empty:
+                continue
+            vals = chunk.loc[wide.index, periods]
+            long = (
+                pd.concat([wide, vals], axis=1)
+                .melt(id_vars=dims, value_vars=periods, var_name=time_name, value_name="value")
+            )
+            long["value"] = pd.to_numeric(
+                long["value"].str.extract(r"^\s*([-+]?[0-9.]+(?:[eE][-+]?[0-9]+)?)", expand=False),
+                errors="coerce",
+            ).astype("float64")
+            long = long.dropna(subset=["value"])
+            for dim in out_dims:
+                long[f"{dim}_name"] = long[dim]
+            yield long[_tidy_columns(out_dims)]
+
+    return _concat_chunks(_chunks(), out_dims)
+
+
+def fetch_sdmx_csv(
+    dataset_code: str,
+    params: Dict[str, str],
+    row_filter: RowFilter | None = None,
+    timeout: int = 60,
+) -> pd.DataFrame:
+    """
+    Stream a gzip-compressed SDMX-CSV dataset from Eurostat and parse it chunk by chunk.
+    """
+    params = dict(params)
+    params["format"] = "SDMX-CSV"
+    params.setdefault("labels", "both")
+    with _stream_remote(dataset_code, params, timeout) as body:
+        return sdmx_csv_to_df(body, row_filter=row_filter)
+
+
+def fetch_labels(dataset_code: str, timeout: int = 60) -> Dict[str, Dict[str, str]]:
+    """
+    Code -> label mapping per dimension of a dataset. One JSON-stat request for the last
+    period only: the dimension metadata is complete while the payload stays small.
+    """
+    js = fetch_jsonstat(dataset_code, {"lastTimePeriod": "1"}, timeout=timeout)
+    return {dim: _safe_get(js, "dimension", dim, "category", "label") or {} for dim in js["id"]}
+
+
+def apply_labels(df: pd.DataFrame, labels: Dict[str, Dict[str, str]]) -> pd.DataFrame:
+    """Fill the *_name columns of a tidy frame from a fetch_labels mapping (codes without a label are kept)."""
+    df = df.copy()
+    for dim, mapping in labels.items():
+        if dim not in df.columns or f"{dim}_name" not in df.columns or not mapping:
+            continue
+        codes = df[dim].astype("category")
+        df[f"{dim}_name"] = _name_column(
+            codes.cat.codes.to_numpy(), list(codes.cat.categories.astype(str)), mapping
+        )
+    return df
+
+
+def fetch_tsv(
+    dataset_code: str,
+    params: Dict[str, str],
+    row_filter: RowFilter | None = None,
+    timeout: int = 60,
+    labels: bool = True,
+) -> pd.DataFrame:
+    """
+    Stream a gzip-compressed bulk TSV dataset from Eurostat and parse it chunk by chunk.
+    The bulk file has no labels; with labels=True they are looked up once (fetch_labels)
+    so the frame matches jsonstat_to_df, region names included.
+    """
+    params = dict(params)
+    params["format"] = "TSV"
+    with _stream_remote(dataset_code, params, timeout) as body:
+        df = tsv_to_df(body, row_filter=row_filter)
+    return apply_labels(df, fetch_labels(dataset_code, timeout)) if labels else df
+
+
+def fetch_dataset(ds: EurostatDataset, row_filter: RowFilter | None = None) -> pd.DataFrame:
+    """
+    Fetch a dataset with its configured backend and return the tidy observation frame.
+    row_filter is applied while streaming for the SDMX-CSV / TSV backends and after
+    parsing for JSON-stat.
+    """
+    if ds.backend == "jsonstat":
+        df = jsonstat_to_df(fetch_jsonstat(ds.code, ds.params))
+        return row_filter(df) if row_filter is not None else df
+
+    # format/lang belong to the JSON-stat API; the SDMX fetchers set their own format
+    params = {k: v for k, v in ds.params.items() if k not in ("format", "lang")}
+    if ds.backend == "sdmx_csv":
+        return fetch_sdmx_csv(ds.code, params, row_filter=row_filter)
+    if ds.backend == "tsv":
+        return fetch_tsv(ds.code, params, row_filter=row_filter)
+    raise ValueError(f"Unknown backend {ds.backend!r}; expected one of {BACKENDS}")
+
+
+def filter_italy_nuts(df: pd.DataFrame, geo_col: str = "geo", level: int = 2) -> pd.DataFrame:
+    """
+    Keep Italian regions of one NUTS level.
+    NUTS codes are the country code plus one character per level
+    (NUTS2: ITC1, ITF3; NUTS3: ITC11, ITF33).
     """
     if geo_col not in df.columns:
         return df
-    mask = df[geo_col].astype(str).str.match(r"^IT.{2}$")
+    pattern = rf"^IT.{{{level}}}$"
+    if isinstance(df[geo_col].dtype, pd.CategoricalDtype):
+        # match the distinct codes only, then select rows by membership
+        cats = df[geo_col].cat.categories
+        keep = cats[cats.astype(str).str.match(pattern)]
+        mask = df[geo_col].isin(keep)
+    else:
+        mask = df[geo_col].astype(str).str.match(pattern)
     return df.loc[mask].copy()
 
 
+def filter_italy_nuts2(df: pd.DataFrame, geo_col: str = "geo") -> pd.DataFrame:
+    """
+    Keep Italy NUTS2 regions.
+    Empirically, NUTS2 codes are length 4, start with 'IT' (e.g., ITC1, ITF3).
+    """
+    return filter_italy_nuts(df, geo_col=geo_col, level=2)
+
+
 def pick_first_available(df: pd.DataFrame, dim: str, preferred: List[str]) -> str | None:
     if dim not in df.columns:
         return None
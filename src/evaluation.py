@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import product
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+
+# Sliced evaluation cube.
+#
+# Predictions are reduced once, in a single grouped NumPy pass, to additive
+# sufficient statistics (n, sum of residuals, |residuals|, squared residuals,
+# y, y^2 and a sparse residual histogram) per finest slice
+# (model x geo x year x horizon x cluster). Every roll-up ("ALL" for any subset
+# of dimensions) is then aggregated from those statistics, not from the rows,
+# and the metrics are derived at the end. Queries are boolean masks on
+# integer codes, so the dashboard can slice instantly.
+
+CUBE_DIMS = ["model", "geo", "year", "horizon", "cluster"]
+ALL = "ALL"
+
+_SUMS = ["n", "sum_res", "sum_abs", "sum_sq", "sum_y", "sum_y2"]
+QUANTILES = (0.1, 0.5, 0.9)
+
+
+@dataclass(frozen=True)
+class EvalCube:
+    table: pd.DataFrame  # one row per slice: CUBE_DIMS (categorical, "ALL" = rolled up) + metrics
+    # Residual histograms as sparse (slice row, bin, count) triples sorted by slice then bin;
+    # most slices hold a handful of residuals so a dense (slices x bins) array would be mostly 0.
+    hist_slice: np.ndarray
+    hist_bin: np.ndarray
+    hist_count: np.ndarray
+    bin_edges: np.ndarray
+
+
+def _group_sums(inv: np.ndarray, n_groups: int, weights: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    return {k: np.bincount(inv, weights=w, minlength=n_groups) for k, w in weights.items()}
+
+
+def _sparse_hist(slice_idx: np.ndarray, bins: np.ndarray, counts: np.ndarray, n_bins: int):
+    """Sum counts per (slice, bin) and return the non-zero triples sorted by slice then bin."""
+    flat = slice_idx.astype(np.int64) * n_bins + bins
+    keys, inv = np.unique(flat, return_inverse=True)
+    summed = np.bincount(inv, weights=counts, minlength=len(keys))
+    return (keys // n_bins).astype(np.int32), (keys % n_bins).astype(np.int16), summed.astype(np.int32)
+
+
+def _hist_quantiles(
+    hist_slice: np.ndarray,
+    hist_bin: np.ndarray,
+    hist_count: np.ndarray,
+    n_slices: int,
+    bin_edges: np.ndarray,
+    qs: Iterable[float],
+) -> np.ndarray:
+    """
+    Approximate residual quantiles per slice from the sparse histograms, interpolated
+    linearly within the bin that holds the quantile. Residuals clipped into the edge bins
+    make quantiles that fall there only bounded by the range, not exact.
+    """
+    qs = tuple(qs)  # may be a one-shot iterator; it is used twice below
+    out = np.full((n_slices, len(qs)), np.nan)
+    if not len(hist_slice):
+        return out
+
+    starts = np.flatnonzero(np.r_[True, hist_slice[1:] != hist_slice[:-1]])
+    present = hist_slice[starts]
+    cum = np.cumsum(hist_count)
+    # cumulative count within each slice
+    offset = np.repeat(cum[starts] - hist_count[starts], np.diff(np.r_[starts, len(cum)]))
+    cum_in = cum - offset
+    n = np.repeat(cum_in[np.r_[starts[1:], len(cum)] - 1], np.diff(np.r_[starts, len(cum)]))
+    positions = np.arange(len(cum))
+    for j, q in enumerate(qs):
+        first = np.where(cum_in >= q * n, positions, len(cum))
+        idx = np.minimum.reduceat(first, starts)
+        below = cum_in[idx] - hist_count[idx]
+        frac = (q * n[idx] - below) / hist_count[idx]
+        lo, hi = bin_edges[hist_bin[idx]], bin_edges[hist_bin[idx] + 1]
+        out[present, j] = lo + frac * (hi - lo)
+    return out
+
+
+def build_cube(
+    preds: pd.DataFrame,
+    clusters: pd.Series | None = None,
+    n_bins: int = 200,
+    clip_quantile: float = 0.995,
+) -> EvalCube:
+    """
+    Build the evaluation cube from a predictions frame (model, geo, year, y_true_next_year,
+    y_pred_next_year; optional horizon). clusters maps geo -> cluster id; regions without
+    a cluster get -1.
+
+    Residual histograms share n_bins equal-width bins over +-the clip_quantile of |residual|;
+    the few residuals beyond go into the edge bins, so outliers do not coarsen the bins.
+    """
+    y = preds["y_true_next_year"].to_numpy(dtype=np.float64)
+    res = y - preds["y_pred_next_year"].to_numpy(dtype=np.float64)
+    ok = ~(np.isnan(y) | np.isnan(res))
+    y, res = y[ok], res[ok]
+
+    dims = pd.DataFrame(
+        {
+            "model": preds["model"].astype(str).to_numpy()[ok],
+            "geo": preds["geo"].astype(str).to_numpy()[ok],
+            "year": preds["year"].astype(str).to_numpy()[ok],
+            "horizon": (preds["horizon"] if "horizon" in preds else pd.Series(1, index=preds.index))
+            .astype(str)
+            .to_numpy()[ok],
+        }
+    )
+    geo_cluster = clusters if clusters is not None else pd.Series(dtype="int64")
+    dims["cluster"] = dims["geo"].map(geo_cluster.rename(index=str)).fillna(-1).astype(int).astype(str)
+
+    # Integer codes per dimension; code == len(categories) stands for ALL
+    codes: List[np.ndarray] = []
+    cats: List[pd.Index] = []
+    for d in CUBE_DIMS:
+        c, u = pd.factorize(dims[d], sort=True)
+        codes.append(c)
+        cats.append(pd.Index(u, dtype=object))
+    sizes = [len(c) + 1 for c in cats]
+
+    lim = float(np.quantile(np.abs(res), clip_quantile)) if len(res) else 1.0
+    bin_edges = np.linspace(-lim, lim, n_bins + 1) if lim > 0 else np.linspace(-1.0, 1.0, n_bins + 1)
+    bins = np.clip(np.searchsorted(bin_edges, res, side="right") - 1, 0, n_bins - 1)
+
+    # Single grouped pass over the prediction rows -> finest slices
+    flat = np.ravel_multi_index(codes, sizes)
+    keys, inv = np.unique(flat, return_inverse=True)
+    sums = _group_sums(
+        inv,
+        len(keys),
+        {
+            "n": np.ones_like(res),
+            "sum_res": res,
+            "sum_abs": np.abs(res),
+            "sum_sq": res**2,
+            "sum_y": y,
+            "sum_y2": y**2,
+        },
+    )
+    hist = _sparse_hist(inv, bins, np.ones_like(bins), n_bins)
+    fine = np.stack(np.unravel_index(keys, sizes), axis=1)
+
+    # Roll-ups from the sufficient statistics of the finest slices
+    all_codes, all_sums, all_hist = [], [], []
+    offset = 0
+    for mask in product((False, True), repeat=len(CUBE_DIMS)):
+        c = fine.copy()
+        for j, rolled in enumerate(mask):
+            if rolled:
+                c[:, j] = sizes[j] - 1
+        k, i = np.unique(np.ravel_multi_index(c.T, sizes), return_inverse=True)
+        all_codes.append(np.stack(np.unravel_index(k, sizes), axis=1))
+        all_sums.append(_group_sums(i, len(k), sums))
+        all_hist.append(_sparse_hist(i[hist[0]] + offset, hist[1], hist[2], n_bins))
+        offset += len(k)
+
+    cube_codes = np.concatenate(all_codes)
+    s = {k: np.concatenate([a[k] for a in all_sums]) for k in _SUMS}
+    hist_slice, hist_bin, hist_count = (np.concatenate(parts) for parts in zip(*all_hist))
+
+    table = pd.DataFrame(
+        {
+            d: pd.Categorical.from_codes(cube_codes[:, j], categories=list(cats[j]) + [ALL])
+            for j, d in enumerate(CUBE_DIMS)
+        }
+    )
+    n = s["n"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ss_tot = s["sum_y2"] - s["sum_y"] ** 2 / n
+        table["n"] = n.astype(np.int32)
+        table["bias"] = (s["sum_res"] / n).astype(np.float32)
+        table["MAE"] = (s["sum_abs"] / n).astype(np.float32)
+        table["RMSE"] = np.sqrt(s["sum_sq"] / n).astype(np.float32)
+        table["R2"] = np.where(ss_tot > 1e-12, 1 - s["sum_sq"] / ss_tot, np.nan).astype(np.float32)
+    q = _hist_quantiles(hist_slice, hist_bin, hist_count, len(table), bin_edges, QUANTILES)
+    q = q.astype(np.float32)
+    for j, qq in enumerate(QUANTILES):
+        table[f"res_p{int(qq * 100)}"] = q[:, j]
+
+    return EvalCube(
+        table=table,
+        hist_slice=hist_slice,
+        hist_bin=hist_bin,
+        hist_count=hist_count,
+        bin_edges=bin_edges,
+    )
+
+
+def query_cube(cube: EvalCube, by: Iterable[str] = (), **filters: str) -> pd.DataFrame:
+    """
+    Select slices: dimensions in `by` are broken down (every value except ALL), dimensions
+    given as keyword filters are fixed to that value, all others are rolled up (ALL).
+    e.g. query_cube(cube, by=["geo"], model="ridge") -> per-region metrics of ridge.
+    """
+    by = set(by)
+    unknown = (by | set(filters)) - set(CUBE_DIMS)
+    if unknown:
+        raise ValueError(f"Unknown cube dimensions {sorted(unknown)}; expected {CUBE_DIMS}")
+
+    t = cube.table
+    mask = np.ones(len(t), dtype=bool)
+    for d in CUBE_DIMS:
+        col = t[d]
+        if d in filters:
+            mask &= (col == str(filters[d])).to_numpy()
+        elif d in by:
+            mask &= (col != ALL).to_numpy()
+        else:
+            mask &= (col == ALL).to_numpy()
+    return t.loc[mask].reset_index(drop=True)
+
+
+def residual_histogram(cube: EvalCube, **filters: str) -> pd.DataFrame:
+    """Residual histogram (bin centre, count) of a single slice."""
+    t = cube.table
+    mask = np.ones(len(t), dtype=bool)
+    for d in CUBE_DIMS:
+        mask &= (t[d] == str(filters.get(d, ALL))).to_numpy()
+    idx = np.flatnonzero(mask)
+    centres = (cube.bin_edges[:-1] + cube.bin_edges[1:]) / 2
+    counts = np.zeros(len(centres), dtype=np.int32)
+    if len(idx):
+        lo, hi = np.searchsorted(cube.hist_slice, [idx[0], idx[0] + 1])
+        counts[cube.hist_bin[lo:hi]] = cube.hist_count[lo:hi]
+    return pd.DataFrame({"residual": centres, "count": counts})
+
+
+def save_cube(cube: EvalCube, path: str | Path) -> None:
+    arrays: Dict[str, np.ndarray] = {
+        "hist_slice": cube.hist_slice,
+        "hist_bin": cube.hist_bin,
+        "hist_count": cube.hist_count,
+        "bin_edges": cube.bin_edges,
+    }
+    for d in CUBE_DIMS:
+        arrays[f"{d}__codes"] = cube.table[d].cat.codes.to_numpy().astype(np.int32)
+        arrays[f"{d}__categories"] = np.asarray(cube.table[d].cat.categories, dtype=str)
+    for c in [c for c in cube.table.columns if c not in CUBE_DIMS]:
+        arrays[c] = cube.table[c].to_numpy()
+    np.savez_compressed(path, **arrays)
+
+
+def load_cube(path: str | Path) -> EvalCube:
+    arrays = ("hist_slice", "hist_bin", "hist_count", "bin_edges")
+    with np.load(path) as z:
+        data = {}
+        for d in CUBE_DIMS:
+            data[d] = pd.Categorical.from_codes(z[f"{d}__codes"], categories=list(z[f"{d}__categories"]))
+        for c in z.files:
+            if c not in arrays and "__" not in c:
+                data[c] = z[c]
+        return EvalCube(table=pd.DataFrame(data), **{a: z[a] for a in arrays})
@@ -1,23 +1,68 @@
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
+from .periods import period_season, periods_per_year
+from .schema import FEATURE_DTYPES, apply_schema
 
-def add_features(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.sort_values(["geo", "year"]).copy()
+
+def _period_lag(df: pd.DataFrame, col: str, k: int) -> np.ndarray:
+    """
+    Value of col k periods earlier in the same region (k < 0 looks ahead).
+    Matches on the exact period index, so gaps in a region's history give NaN
+    instead of silently using an older observation. df must be sorted by geo, period.
+    """
+    # One sortable int64 key per row: region code in the high bits, period in the low bits
+    if df.empty:
+        return np.empty(0)
+    key = df["geo"].cat.codes.to_numpy().astype(np.int64) << 32 | df["period"].to_numpy().astype(np.int64)
+    want = key - k
+    pos = np.searchsorted(key, want).clip(max=len(key) - 1)
+    found = key[pos] == want
+    values = df[col].to_numpy(dtype=float)
+    return np.where(found, values[pos], np.nan)
+
+
+def add_features(df: pd.DataFrame, freq: str = "A") -> pd.DataFrame:
+    """
+    Lags are in periods of freq; GDP (annual) growth and the target are one year
+    apart, i.e. periods_per_year(freq) periods. For annual data all of them are one year.
+    """
+    steps = periods_per_year(freq)
+    df = df.copy()
+    if "period" not in df.columns:
+        # annual panels built before periods existed
+        df["period"] = df["year"].astype("int32")
+    if not isinstance(df["geo"].dtype, pd.CategoricalDtype):
+        df["geo"] = df["geo"].astype("category")
+    df = df.sort_values(["geo", "period"]).reset_index(drop=True)
+
+    df["season"] = period_season(df["period"], freq)
 
     # Lag features per region
-    df["unemp_rate_lag1"] = df.groupby("geo")["unemp_rate"].shift(1)
-    df["gdp_lag1"] = df.groupby("geo")["gdp"].shift(1)
+    df["unemp_rate_lag1"] = _period_lag(df, "unemp_rate", 1)
+    df["gdp_lag1"] = _period_lag(df, "gdp", steps)
 
     # YoY GDP growth (%)
-    df["gdp_yoy_pct"] = (
-        (df["gdp"] - df.groupby("geo")["gdp"].shift(1))
-        / df.groupby("geo")["gdp"].shift(1)
-        * 100.0
-    )
+    df["gdp_yoy_pct"] = (df["gdp"] - df["gdp_lag1"]) / df["gdp_lag1"] * 100.0
+
+    # Target: unemployment one year ahead
+    df["target_unemp_next_year"] = _period_lag(df, "unemp_rate", -steps)
+
+    return apply_schema(df, FEATURE_DTYPES)
 
-    # Target: next-year unemployment
-    df["target_unemp_next_year"] = df.groupby("geo")["unemp_rate"].shift(-1)
 
-    return df
\ No newline at end of file
+def update_features(
+    feat: pd.DataFrame, panel: pd.DataFrame, geos: set[str], freq: str = "A"
+) -> pd.DataFrame:
+    """
+    Recompute features only for the given regions and splice them into an existing
+    feature table. Lags and targets are per region, so other regions are unaffected.
+    """
+    touched = panel["geo"].astype(str).isin(geos)
+    fresh = add_features(panel.loc[touched], freq)
+    kept = feat.loc[~feat["geo"].astype(str).isin(geos)]
+    out = pd.concat([kept.astype({"geo": str}), fresh.astype({"geo": str})], ignore_index=True)
+    out = out.sort_values(["geo", "period"]).reset_index(drop=True)
+    return apply_schema(out, FEATURE_DTYPES)
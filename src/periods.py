@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+# Time periods as integer indices.
+#
+# A period of frequency f is stored as  year * steps + (sub - 1),  where steps is
+# the number of periods per year (A=1, Q=4, M=12) and sub the quarter / month.
+# Annual indices are therefore the year itself, consecutive periods differ by 1
+# and "one year earlier" is always  period - steps.  Strings are parsed once per
+# distinct label (categories / factorized uniques), never per row.
+
+FREQ_STEPS = {"A": 1, "Q": 4, "M": 12}
+
+# "2019", "2019-Q3", "2019Q3", "2019-07", "2019M07", "2019-M07"
+_PERIOD_RE = r"^\s*(\d{4})(?:-?([QqMm])?-?(\d{1,2}))?\s*$"
+
+
+def periods_per_year(freq: str) -> int:
+    try:
+        return FREQ_STEPS[freq]
+    except KeyError:
+        raise ValueError(f"Unknown frequency {freq!r}; expected one of {list(FREQ_STEPS)}") from None
+
+
+def _parse_labels(labels: pd.Index, freq: str) -> np.ndarray:
+    steps = periods_per_year(freq)
+    parts = pd.Series(labels.astype(str)).str.extract(_PERIOD_RE)
+    year = pd.to_numeric(parts[0], errors="coerce").to_numpy(dtype=float)
+    kind = parts[1].str.upper()
+    sub = pd.to_numeric(parts[2], errors="coerce").to_numpy(dtype=float)
+
+    if freq == "A":
+        valid = parts[2].isna().to_numpy()
+        sub = np.ones_like(year)
+    elif freq == "Q":
+        valid = (kind == "Q").to_numpy() & (sub >= 1) & (sub <= 4)
+    else:
+        valid = kind.isin(["M", np.nan]).to_numpy() & (sub >= 1) & (sub <= 12)
+
+    idx = year * steps + (sub - 1)
+    idx[~valid] = np.nan
+    return idx
+
+
+def parse_periods(s: pd.Series, freq: str) -> pd.Series:
+    """
+    Parse period labels into integer period indices (float64 with NaN for labels
+    that are not valid periods of this frequency; drop them before casting).
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes, uniques = s.cat.codes.to_numpy(), s.cat.categories
+    else:
+        codes, uniques = pd.factorize(s)
+    parsed = np.append(_parse_labels(pd.Index(uniques), freq), np.nan)
+    # code -1 (missing) picks the trailing NaN
+    return pd.Series(parsed[codes], index=s.index)
+
+
+def period_year(period, freq: str):
+    return period // periods_per_year(freq)
+
+
+def period_season(period, freq: str):
+    """Quarter / month within the year, 0-based (always 0 for annual data)."""
+    return period % periods_per_year(freq)
+
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import pandas as pd
+
+
+# Compact in-memory types shared by every pipeline stage.
+# geo is categorical; the human-readable region name lives in a separate
+# label table (geo -> region) and is only joined back when writing outputs.
+# unemp_rate has one decimal and fits float32; GDP (MIO_EUR up to ~1e6 with
+# two decimals) keeps float64 so growth rates are not distorted.
+PANEL_DTYPES: Dict[str, str] = {
+    "geo": "category",
+    "year": "int16",
+    "period": "int32",  # integer period index, see src/periods.py
+    "unemp_rate": "float32",
+    "gdp": "float64",
+}
+
+FEATURE_DTYPES: Dict[str, str] = {
+    **PANEL_DTYPES,
+    "season": "int8",
+    "unemp_rate_lag1": "float32",
+    "gdp_lag1": "float64",
+    "gdp_yoy_pct": "float32",
+    "target_unemp_next_year": "float32",
+}
+
+PREDICTION_DTYPES: Dict[str, str] = {
+    "geo": "category",
+    "year": "int16",
+    "period": "int32",
+    "horizon": "int16",  # periods ahead
+    "unemp_rate": "float32",
+    "model": "category",
+    "y_true_next_year": "float32",
+    "y_pred_next_year": "float32",
+    "residual": "float32",
+}
+
+LABEL_COLS = ["geo", "region"]
+
+
+def categorize(df: pd.DataFrame, cols: Iterable[str]) -> pd.DataFrame:
+    """Cast the given columns to category in place (columns that are missing are skipped)."""
+    for c in cols:
+        if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype("category")
+    return df
+
+
+def apply_schema(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """
+    Cast the columns present in df to the compact dtypes.
+    Rows with a missing year are expected to be dropped before calling this (int16 has no NA).
+    """
+    cast = {c: t for c, t in dtypes.items() if c in df.columns and str(df[c].dtype) != t}
+    df = df.astype(cast) if cast else df
+    for c, t in dtypes.items():
+        if t == "category" and c in df.columns:
+            df[c] = df[c].cat.remove_unused_categories()
+    return df
+
+
+def union_categories(frames: List[pd.DataFrame], col: str) -> List[pd.DataFrame]:
+    """Give col the same categorical dtype in every frame so merges keep it categorical."""
+    values = set()
+    for f in frames:
+        values.update(f[col].dropna().astype(str).unique())
+    dtype = pd.CategoricalDtype(sorted(values))
+    return [f.assign(**{col: f[col].astype(str).astype(dtype)}) for f in frames]
+
+
+def split_labels(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Move the region name out of df into a geo -> region label table."""
+    if "region" not in df.columns:
+        return df, pd.DataFrame(columns=LABEL_COLS)
+    labels = (
+        df[LABEL_COLS]
+        .astype(str)
+        .drop_duplicates("geo")
+        .sort_values("geo")
+        .reset_index(drop=True)
+    )
+    return df.drop(columns="region"), labels
+
+
+def attach_labels(df: pd.DataFrame, labels: pd.DataFrame | None) -> pd.DataFrame:
+    """Insert the region name next to geo (used when writing outputs for people to read)."""
+    if labels is None or labels.empty or "region" in df.columns:
+        return df
+    names = df["geo"].astype(str).map(labels.set_index("geo")["region"])
+    out = df.copy()
+    out.insert(out.columns.get_loc("geo") + 1, "region", names.astype("category"))
+    return out
+
+
+def read_table(path: str | Path, dtypes: Dict[str, str]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Read a processed CSV into compact dtypes; returns (frame, labels)."""
+    read_types = {c: ("str" if t.startswith("int") else t) for c, t in dtypes.items()}
+    df = pd.read_csv(path, dtype=read_types)
+    for c in [c for c, t in dtypes.items() if t.startswith("int")]:
+        if c in df.columns:
+            df = df.dropna(subset=[c])
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+    df, labels = split_labels(df)
+    return apply_schema(df, dtypes), labels
+
+
+def write_table(df: pd.DataFrame, path: str | Path, labels: pd.DataFrame | None = None) -> None:
+    """Write a frame to CSV with region labels joined back in."""
+    attach_labels(df, labels).to_csv(path, index=False)
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def report_memory(stage: str, df: pd.DataFrame) -> None:
+    print(f"   [{stage}] {len(df):,} rows x {df.shape[1]} cols, {memory_mb(df):.3f} MB")
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from .schema import categorize
+from .utils import ensure_dir
+
+
+# Append-only observation store.
+#
+# One CSV per dataset (data/store/<code>.csv). Each fetch appends only the
+# observations that are new or whose value changed, tagged with the fetch
+# vintage (UTC timestamp). The latest value of an observation is its row
+# with the greatest vintage; reading "as of" a vintage ignores later rows,
+# which gives reproducible point-in-time snapshots for backtests.
+#
+# Observations are keyed by (dataset, dimension codes, time); *_name label
+# columns are carried along but are not part of the key.
+
+VINTAGE_COL = "vintage"
+
+
+def new_vintage() -> str:
+    return pd.Timestamp.now(tz="UTC").strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _store_path(store_dir: str | Path, dataset_code: str) -> Path:
+    return Path(store_dir) / f"{dataset_code}.csv"
+
+
+def key_columns(df: pd.DataFrame) -> List[str]:
+    """Dimension code columns (incl. time) that identify an observation."""
+    return [c for c in df.columns if c not in ("value", VINTAGE_COL) and not c.endswith("_name")]
+
+
+def _read_header(path: Path) -> List[str]:
+    with open(path, encoding="utf-8", newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def _read_log(store_dir: str | Path, dataset_code: str) -> pd.DataFrame:
+    path = _store_path(store_dir, dataset_code)
+    if not path.exists():
+        return pd.DataFrame()
+    log = pd.read_csv(path, dtype=str, keep_default_na=False)
+    log["value"] = pd.to_numeric(log["value"], errors="coerce")
+    return log
+
+
+def _up_to(vintages: pd.Series, as_of: str) -> np.ndarray:
+    """Mask of vintages at or before as_of (a plain date means midnight UTC)."""
+    cutoff = pd.Timestamp(as_of)
+    cutoff = cutoff.tz_localize("UTC") if cutoff.tzinfo is None else cutoff.tz_convert("UTC")
+    return (pd.to_datetime(vintages, utc=True) <= cutoff).to_numpy()
+
+
+def read_observations(
+    store_dir: str | Path, dataset_code: str, as_of: str | None = None
+) -> pd.DataFrame:
+    """
+    Latest value of every observation, optionally as of a vintage (inclusive;
+    a plain date means midnight UTC). Returns the tidy frame of jsonstat_to_df
+    plus the vintage each value was first seen in.
+    """
+    log = _read_log(store_dir, dataset_code)
+    if log.empty:
+        return log
+
+    if as_of is not None:
+        log = log.loc[_up_to(log[VINTAGE_COL], as_of)]
+
+    # ISO vintages sort lexicographically; keep the last row per key
+    keys = key_columns(log)
+    latest = (
+        log.sort_values(VINTAGE_COL, kind="stable")
+        .drop_duplicates(keys, keep="last")
+        .dropna(subset=["value"])
+        .reset_index(drop=True)
+    )
+    return categorize(latest, [c for c in latest.columns if c not in ("value", VINTAGE_COL)])
+
+
+def append_observations(
+    store_dir: str | Path,
+    dataset_code: str,
+    df: pd.DataFrame,
+    vintage: str | None = None,
+) -> pd.DataFrame:
+    """
+    Compare a freshly fetched tidy frame with the latest stored values and append
+    the new and revised observations under one vintage.
+
+    Returns the delta: the appended rows with a "change" column ("new" or "revised")
+    and "previous_value" for revisions. Observations missing from the new fetch are
+    left untouched (Eurostat rarely withdraws values; a later fetch can revise them).
+    """
+    ensure_dir(store_dir)
+    vintage = vintage or new_vintage()
+
+    incoming = df.copy()
+    cols = list(incoming.columns)
+    for c in cols:
+        if c != "value":
+            incoming[c] = incoming[c].astype(str)
+    keys = key_columns(incoming)
+
+    # Another backend / DSD version may order the dimensions differently, which is fine;
+    # a different set of key columns would make old and new observations incomparable.
+    path = _store_path(store_dir, dataset_code)
+    header = _read_header(path) if path.exists() else []
+    stored_keys = key_columns(pd.DataFrame(columns=header))
+    if header and set(stored_keys) != set(keys):
+        raise ValueError(
+            f"{dataset_code}: fetched key columns {sorted(keys)} do not match "
+            f"the store's {sorted(stored_keys)} ({path})"
+        )
+
+    current = read_observations(store_dir, dataset_code)
+    if current.empty:
+        merged = incoming.assign(previous_value=np.nan, _merge="left_only")
+    else:
+        prev = current[keys + ["value"]].astype({k: str for k in keys})
+        merged = incoming.merge(
+            prev.rename(columns={"value": "previous_value"}),
+            on=keys,
+            how="left",
+            indicator=True,
+        )
+
+    is_new = (merged["_merge"] == "left_only").to_numpy()
+    a = merged["value"].to_numpy(dtype=float)
+    b = merged["previous_value"].to_numpy(dtype=float)
+    is_revised = ~is_new & ~(np.isclose(a, b, rtol=0.0, atol=1e-9) | (np.isnan(a) & np.isnan(b)))
+
+    delta = merged.loc[is_new | is_revised, cols + ["previous_value"]].copy()
+    delta["change"] = np.where(is_new[is_new | is_revised], "new", "revised")
+    delta[VINTAGE_COL] = vintage
+
+    if not delta.empty:
+        if header:
+            # appended rows have no header of their own: write them in the log's column order
+            delta.reindex(columns=header).to_csv(path, mode="a", header=False, index=False)
+        else:
+            delta[cols + [VINTAGE_COL]].to_csv(path, index=False)
+
+    return delta.reset_index(drop=True)
+
+
+def list_vintages(store_dir: str | Path, dataset_code: str, as_of: str | None = None) -> List[str]:
+    """Vintages recorded for a dataset (at or before as_of), oldest first."""
+    log = _read_log(store_dir, dataset_code)
+    if log.empty:
+        return []
+    vintages = pd.Series(log[VINTAGE_COL].unique())
+    if as_of is not None:
+        vintages = vintages[_up_to(vintages, as_of)]
+    return sorted(vintages)
+
+
+def summarize_delta(deltas: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, int]]:
+    return {
+        code: {
+            "new": int((d["change"] == "new").sum()),
+            "revised": int((d["change"] == "revised").sum()),
+        }
+        for code, d in deltas.items()
+    }
@@ -5,52 +5,78 @@ from pathlib import Path
 from typing import Dict, Tuple
 
 import pandas as pd
-from sklearn.compose import ColumnTransformer
-from sklearn.impute import SimpleImputer
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import train_test_split
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.linear_model import Ridge
-from sklearn.ensemble import RandomForestRegressor
 
+from .periods import periods_per_year
+from .schema import PREDICTION_DTYPES, apply_schema, split_labels, write_table
 from .utils import ensure_dir, write_json
 
+# sklearn is imported inside the functions below so that importing this module
+# (e.g. from the CLI) does not pull in the ensemble / linear / metrics stacks.
+
+CAT_FEATURES = ["geo"]
+NUM_FEATURES = ["year", "unemp_rate", "gdp", "unemp_rate_lag1", "gdp_lag1", "gdp_yoy_pct"]
+MODEL_NAMES = ["ridge", "random_forest"]
+
+
+def feature_columns(freq: str = "A") -> list[str]:
+    # quarter / month of year only carries information for sub-annual panels
+    seasonal = ["season"] if periods_per_year(freq) > 1 else []
+    return CAT_FEATURES + NUM_FEATURES + seasonal
+
 
 def _rmse(y_true, y_pred) -> float:
+    from sklearn.metrics import mean_squared_error
+
     return math.sqrt(mean_squared_error(y_true, y_pred))
 
 
-def train_time_aware(df_feat: pd.DataFrame, out_dir: str | Path) -> Tuple[pd.DataFrame, Dict]:
+def train_time_aware(
+    df_feat: pd.DataFrame,
+    out_dir: str | Path,
+    labels: pd.DataFrame | None = None,
+    freq: str = "A",
+) -> Tuple[pd.DataFrame, Dict]:
+    import joblib
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.impute import SimpleImputer
+    from sklearn.linear_model import Ridge
+    from sklearn.metrics import mean_absolute_error, r2_score
+    from sklearn.model_selection import train_test_split
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
 
     out_dir = ensure_dir(out_dir)
 
-    df = df_feat.dropna(subset=["target_unemp_next_year"]).copy()
-    df["year"] = pd.to_numeric(df["year"], errors="coerce")
-    df = df.dropna(subset=["year"])
+    df, df_labels = split_labels(df_feat)
+    labels = labels if labels is not None else df_labels
 
-    max_year = int(df["year"].max())
-    test_years = [max_year - 1, max_year]
+    df = df.dropna(subset=["target_unemp_next_year"]).copy()
+    if "period" not in df.columns:
+        df["period"] = pd.to_numeric(df["year"], errors="coerce")
+    df = df.dropna(subset=["period"])
 
-    train = df[~df["year"].isin(test_years)].copy()
-    test = df[df["year"].isin(test_years)].copy()
+    # Hold out the last two years of periods
+    max_period = int(df["period"].max())
+    is_test = (df["period"] > max_period - 2 * periods_per_year(freq)).to_numpy()
+
+    train = df[~is_test].copy()
+    test = df[is_test].copy()
 
     if len(train) < 50 or len(test) < 20:
         train, test = train_test_split(df, test_size=0.2, random_state=42)
 
-    X_train = train[["geo", "year", "unemp_rate", "gdp", "unemp_rate_lag1", "gdp_lag1", "gdp_yoy_pct"]]
+    features = feature_columns(freq)
+    X_train = train[features]
     y_train = train["target_unemp_next_year"]
 
-    X_test = test[["geo", "year", "unemp_rate", "gdp", "unemp_rate_lag1", "gdp_lag1", "gdp_yoy_pct"]]
+    X_test = test[features]
     y_test = test["target_unemp_next_year"]
 
-    cat_features = ["geo"]
-    num_features = ["year", "unemp_rate", "gdp", "unemp_rate_lag1", "gdp_lag1", "gdp_yoy_pct"]
-
     preproc = ColumnTransformer(
         transformers=[
-            ("cat", OneHotEncoder(handle_unknown="ignore"), cat_features),
-            ("num", Pipeline([("imp", SimpleImputer(strategy="median"))]), num_features),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), CAT_FEATURES),
+            ("num", Pipeline([("imp", SimpleImputer(strategy="median"))]), features[len(CAT_FEATURES):]),
         ]
     )
 
@@ -72,6 +98,7 @@ def train_time_aware(df_feat: pd.DataFrame, out_dir: str | Path) -> Tuple[pd.Dat
         pipe.fit(X_train, y_train)
 
         y_pred = pipe.predict(X_test)
+        joblib.dump(pipe, Path(out_dir) / f"{name}.joblib")
 
         metrics[name] = {
             "MAE": float(mean_absolute_error(y_test, y_pred)),
@@ -81,7 +108,8 @@ def train_time_aware(df_feat: pd.DataFrame, out_dir: str | Path) -> Tuple[pd.Dat
             "n_test": int(len(X_test)),
         }
 
-        tmp = test[["geo", "year", "region", "unemp_rate"]].copy()
+        tmp = test[["geo", "year", "period", "unemp_rate"]].copy()
+        tmp["horizon"] = periods_per_year(freq)
         tmp["model"] = name
         tmp["y_true_next_year"] = y_test.to_numpy()
         tmp["y_pred_next_year"] = y_pred
@@ -89,8 +117,51 @@ def train_time_aware(df_feat: pd.DataFrame, out_dir: str | Path) -> Tuple[pd.Dat
 
         preds_all.append(tmp)
 
-    pred_df = pd.concat(preds_all, ignore_index=True)
-    pred_df.to_csv(Path(out_dir) / "predictions.csv", index=False)
+    pred_df = apply_schema(pd.concat(preds_all, ignore_index=True), PREDICTION_DTYPES)
+    write_table(pred_df, Path(out_dir) / "predictions.csv", labels)
     write_json(Path(out_dir) / "metrics.json", metrics)
 
-    return pred_df, metrics
\ No newline at end of file
+    return pred_df, metrics
+
+
+def predict_next_year(
+    df_feat: pd.DataFrame,
+    models_dir: str | Path,
+    labels: pd.DataFrame | None = None,
+    freq: str = "A",
+) -> pd.DataFrame:
+    """
+    Forecast next-year unemployment from the latest observed period of every region,
+    using the pipelines saved by train_time_aware. Writes models/forecast.csv.
+    """
+    import joblib
+
+    models_dir = Path(models_dir)
+
+    df, df_labels = split_labels(df_feat)
+    labels = labels if labels is not None else df_labels
+
+    df = df.copy()
+    if "period" not in df.columns:
+        df["period"] = pd.to_numeric(df["year"], errors="coerce")
+    df = df.dropna(subset=["period"])
+    latest = df.sort_values("period").groupby("geo", observed=True).tail(1)
+
+    out_all = []
+    for name in MODEL_NAMES:
+        path = models_dir / f"{name}.joblib"
+        if not path.exists():
+            continue
+        pipe = joblib.load(path)
+
+        tmp = latest[["geo", "year", "period", "unemp_rate"]].copy()
+        tmp["model"] = name
+        tmp["y_pred_next_year"] = pipe.predict(latest[feature_columns(freq)])
+        out_all.append(tmp)
+
+    if not out_all:
+        raise FileNotFoundError(f"No trained models in {models_dir}; run the train step first")
+
+    forecast = apply_schema(pd.concat(out_all, ignore_index=True), PREDICTION_DTYPES)
+    write_table(forecast, models_dir / "forecast.csv", labels)
+    return forecast
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# tests import the pipeline as `src.*`, like run_pipeline.py and the benchmarks
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+import src.build_dataset as build_dataset
+from src.build_dataset import build_processed_dataset, build_raw_tables
+
+GEOS = ["ITC11", "ITC12", "ITF33"]
+QUARTERS = [f"{y}-Q{q}" for y in (2021, 2022) for q in range(1, 5)]
+
+
+def _tidy(rows: list[dict]) -> pd.DataFrame:
+    df = pd.DataFrame(rows)
+    for c in [c for c in df.columns if c != "value"]:
+        df[f"{c}_name"] = df[c]
+    return df
+
+
+def _unemployment() -> pd.DataFrame:
+    # labour-force style: split by sex and age; the total is the one to keep
+    rows = []
+    for sex, shift in (("F", 1.0), ("M", -1.0), ("T", 0.0)):
+        for age, age_shift in (("Y15-24", 10.0), ("Y15-74", 0.0)):
+            for i, geo in enumerate(GEOS):
+                for j, t in enumerate(QUARTERS):
+                    rows.append({"freq": "Q", "unit": "PC", "sex": sex, "age": age, "geo": geo,
+                                 "time": t, "value": 5.0 + i + j / 10 + shift + age_shift})
+    return _tidy(rows)
+
+
+def _gdp() -> pd.DataFrame:
+    rows = [
+        {"freq": "A", "unit": unit, "na_item": "B1GQ", "geo": geo, "time": str(y),
+         "value": scale * (i + 1)}
+        for unit, scale in (("MIO_EUR", 1e4), ("EUR_HAB", 3e4))
+        for i, geo in enumerate(GEOS)
+        for y in (2021, 2022)
+    ]
+    return _tidy(rows)
+
+
+def test_extra_dimensions_are_narrowed_to_one_observation_per_period(tmp_path, monkeypatch):
+    tables = {"lfst_r_test": _unemployment(), "nama_10r_3gdp": _gdp()}
+    monkeypatch.setattr(build_dataset, "fetch_dataset", lambda ds, row_filter=None: tables[ds.code])
+
+    unemp, gdp = build_raw_tables(tmp_path / "raw", freq="Q", nuts_level=3, unemp_code="lfst_r_test")
+    assert set(unemp["sex"]) == {"T"} and set(unemp["age"]) == {"Y15-74"}
+    assert set(gdp["unit"]) == {"MIO_EUR"}
+
+    panel, _ = build_processed_dataset(tmp_path / "raw", tmp_path / "processed", freq="Q")
+    assert len(panel) == len(GEOS) * len(QUARTERS)
+    assert not panel.duplicated(["geo", "period"]).any()
+    first = panel[panel["geo"] == "ITC11"].sort_values("period")["unemp_rate"].iloc[0]
+    assert first == pytest.approx(5.0)
+
+
+def test_duplicate_periods_are_rejected(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    unemp = _unemployment()
+    unemp[unemp["age"] == "Y15-74"].to_csv(raw / "unemployment_raw.csv", index=False)  # still split by sex
+    _gdp().query("unit == 'MIO_EUR'").to_csv(raw / "gdp_raw.csv", index=False)
+
+    with pytest.raises(ValueError, match="duplicate"):
+        build_processed_dataset(raw, tmp_path / "processed", freq="Q")
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import gc
+import gzip
+import io
+import warnings
+
+import pandas as pd
+import pytest
+
+from src import eurostat_api
+from src.eurostat_api import (
+    fetch_tsv,
+    filter_italy_nuts2,
+    jsonstat_to_df,
+    sdmx_csv_to_df,
+    tsv_to_df,
+)
+
+
+# The same small dataset in the three Eurostat formats. ITF3 2020 is missing,
+# DE11 / ITC11 are dropped by the NUTS2 filter, and the TSV carries status flags.
+GEOS = {"ITC1": "Piemonte", "ITF3": "Campania", "DE11": "Stuttgart", "ITC11": "Torino"}
+YEARS = ["2019", "2020", "2021"]
+VALUES = {
+    "ITC1": [5.1, 6.0, 5.7],
+    "ITF3": [19.8, None, 17.2],
+    "DE11": [2.9, 3.4, 3.1],
+    "ITC11": [6.2, 7.1, 6.8],
+}
+
+JSONSTAT = {
+    "id": ["freq", "unit", "geo", "time"],
+    "size": [1, 1, len(GEOS), len(YEARS)],
+    "dimension": {
+        "freq": {"category": {"index": {"A": 0}, "label": {"A": "Annual"}}},
+        "unit": {"category": {"index": {"PC": 0}, "label": {"PC": "Percentage"}}},
+        "geo": {"category": {"index": {g: i for i, g in enumerate(GEOS)}, "label": GEOS}},
+        "time": {"category": {"index": {y: i for i, y in enumerate(YEARS)}}},
+    },
+    "value": {
+        str(g_i * len(YEARS) + t): v
+        for g_i, vals in enumerate(VALUES.values())
+        for t, v in enumerate(vals)
+        if v is not None
+    },
+}
+
+# labels=both: "code: label" in the header and in every dimension cell
+SDMX_CSV = "\n".join(
+    ["DATAFLOW: Data flow,LAST UPDATE: Last update,freq: Time frequency,unit: Unit of measure,"
+     "geo: Geopolitical entity (reporting),TIME_PERIOD: Time,OBS_VALUE: Observation value,"
+     "OBS_FLAG: Observation status (Flag)"]
+    + [
+        f"ESTAT:TGS00010(1.0),15/04/24 23:00:00,A: Annual,PC: Percentage,{g}: {name},{y},"
+        f"{':' if v is None else v},{'' if v is None else 'p'}"
+        for g, name in GEOS.items()
+        for y, v in zip(YEARS, VALUES[g])
+    ]
+)
+
+# flagged values ("5.1 p", "17.2 b") and ":" for missing, as in the bulk download
+TSV = "\n".join(
+    ["freq,unit,geo\\TIME_PERIOD\t" + "\t".join(f"{y} " for y in YEARS)]
+    + [
+        f"A,PC,{g}\t" + "\t".join(": " if v is None else f"{v} {flag}".strip()
+                                  for v, flag in zip(VALUES[g], ["p", "", "b"]))
+        for g in GEOS
+    ]
+)
+
+CODE_COLS = ["freq", "unit", "geo", "time"]
+
+
+def _observations(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
+    return (
+        df[cols + ["value"]]
+        .astype({c: str for c in cols})
+        .sort_values(cols)
+        .reset_index(drop=True)
+    )
+
+
+@pytest.fixture(params=["plain", "gzip"])
+def payload(request):
+    def _make(text: str) -> io.BytesIO:
+        raw = text.encode()
+        return io.BytesIO(gzip.compress(raw) if request.param == "gzip" else raw)
+
+    return _make
+
+
+def test_sdmx_csv_matches_jsonstat(payload):
+    expected = filter_italy_nuts2(jsonstat_to_df(JSONSTAT))
+    got = sdmx_csv_to_df(payload(SDMX_CSV), row_filter=filter_italy_nuts2, chunksize=4)
+
+    cols = CODE_COLS + ["geo_name", "unit_name", "freq_name"]
+    pd.testing.assert_frame_equal(_observations(got, cols), _observations(expected, cols))
+    assert list(got.columns) == list(expected.columns)
+
+
+def test_tsv_matches_jsonstat(payload):
+    expected = filter_italy_nuts2(jsonstat_to_df(JSONSTAT))
+    got = tsv_to_df(payload(TSV), row_filter=filter_italy_nuts2, chunksize=2)
+
+    pd.testing.assert_frame_equal(_observations(got, CODE_COLS), _observations(expected, CODE_COLS))
+    # no labels in TSV: names repeat the codes
+    assert (got["geo_name"].astype(str) == got["geo"].astype(str)).all()
+
+
+def test_missing_and_flagged_values():
+    sdmx = sdmx_csv_to_df(io.BytesIO(SDMX_CSV.encode()))
+    tsv = tsv_to_df(io.BytesIO(TSV.encode()))
+
+    for df in (sdmx, tsv):
+        assert df["value"].dtype == "float64"
+        assert not ((df["geo"] == "ITF3") & (df["time"] == "2020")).any()
+        itc1 = df[df["geo"] == "ITC1"].sort_values("time")["value"].tolist()
+        assert itc1 == [5.1, 6.0, 5.7]
+    assert len(sdmx) == len(tsv) == len(JSONSTAT["value"])
+
+
+def test_header_only_input():
+    header = SDMX_CSV.splitlines()[0]
+    df = sdmx_csv_to_df(io.BytesIO(header.encode()))
+    assert df.empty
+    assert list(df.columns) == ["freq", "freq_name", "unit", "unit_name", "geo", "geo_name",
+                                "time", "time_name", "value"]
+
+
+def test_parsers_close_only_what_they_open(tmp_path):
+    path = tmp_path / "data.csv.gz"
+    path.write_bytes(gzip.compress(SDMX_CSV.encode()))
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        sdmx_csv_to_df(path)
+        tsv_to_df(io.BytesIO(gzip.compress(TSV.encode())))
+        gc.collect()
+    assert not [w for w in caught if issubclass(w.category, ResourceWarning)]
+
+    stream = io.BytesIO(TSV.encode())
+    tsv_to_df(stream)
+    gc.collect()
+    assert not stream.closed
+
+
+def test_streaming_fetch_releases_the_connection(monkeypatch):
+    requests = pytest.importorskip("requests")
+
+    class FakeResponse:
+        closed = False
+
+        def __init__(self, body: bytes):
+            self.raw = io.BytesIO(body)
+
+        def raise_for_status(self):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.closed = True
+
+    responses = []
+
+    def fake_get(url, **kwargs):
+        assert kwargs["stream"] is True
+        responses.append(FakeResponse(gzip.compress(TSV.encode())))
+        return responses[-1]
+
+    monkeypatch.setattr(requests, "get", fake_get)
+    df = fetch_tsv("tgs00010", {}, row_filter=filter_italy_nuts2, labels=False)
+    assert len(df) and responses[0].closed
+
+    # with labels, the one-off JSON-stat lookup fills in the names
+    lookups = []
+    monkeypatch.setattr(
+        eurostat_api, "fetch_jsonstat", lambda code, params, timeout=60: lookups.append(params) or JSONSTAT
+    )
+    df = fetch_tsv("tgs00010", {}, row_filter=filter_italy_nuts2)
+    expected = filter_italy_nuts2(jsonstat_to_df(JSONSTAT))
+    cols = CODE_COLS + ["geo_name", "unit_name", "freq_name"]
+    pd.testing.assert_frame_equal(_observations(df, cols), _observations(expected, cols))
+    assert lookups == [{"lastTimePeriod": "1"}]
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.evaluation import _hist_quantiles, build_cube, load_cube, query_cube, save_cube
+
+
+@pytest.fixture
+def preds() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n = 20_000
+    df = pd.DataFrame(
+        {
+            "model": rng.choice(["ridge", "random_forest"], n),
+            "geo": rng.choice(["ITC1", "ITC4", "ITF3", "ITG1"], n),
+            "year": rng.integers(2015, 2023, n),
+        }
+    )
+    df["y_true_next_year"] = rng.uniform(3, 20, n)
+    df["y_pred_next_year"] = df["y_true_next_year"] - rng.normal(0.2, 1.0, n)
+    return df
+
+
+def test_metrics_match_direct_computation(preds):
+    cube = build_cube(preds, pd.Series({"ITC1": 0, "ITC4": 0, "ITF3": 1}))
+    res = preds["y_true_next_year"] - preds["y_pred_next_year"]
+
+    by_model = query_cube(cube, by=["model"]).set_index("model")
+    for model, r in res.groupby(preds["model"]):
+        row = by_model.loc[model]
+        assert row["n"] == len(r)
+        assert row["bias"] == pytest.approx(r.mean(), abs=1e-5)
+        assert row["MAE"] == pytest.approx(r.abs().mean(), abs=1e-5)
+        assert row["RMSE"] == pytest.approx(np.sqrt((r**2).mean()), abs=1e-5)
+
+    # ITG1 has no cluster
+    by_cluster = query_cube(cube, by=["cluster"]).set_index("cluster")["n"]
+    assert by_cluster["-1"] == (preds["geo"] == "ITG1").sum()
+
+
+def test_quantiles_are_not_coarsened_by_an_outlier(preds):
+    preds.loc[0, "y_pred_next_year"] -= 80.0
+    cube = build_cube(preds)
+    res = preds["y_true_next_year"] - preds["y_pred_next_year"]
+
+    by_geo = query_cube(cube, by=["geo"]).set_index("geo")
+    exact = res.groupby(preds["geo"]).quantile([0.1, 0.5, 0.9]).unstack()
+    for j, col in enumerate(["res_p10", "res_p50", "res_p90"]):
+        np.testing.assert_allclose(by_geo[col], exact.loc[by_geo.index].iloc[:, j], atol=0.05)
+
+
+def test_save_load_roundtrip(preds, tmp_path):
+    cube = build_cube(preds)
+    save_cube(cube, tmp_path / "cube.npz")
+    loaded = load_cube(tmp_path / "cube.npz")
+    pd.testing.assert_frame_equal(
+        query_cube(loaded, by=["year"], model="ridge"), query_cube(cube, by=["year"], model="ridge")
+    )
+    np.testing.assert_array_equal(loaded.hist_count, cube.hist_count)
+
+
+def test_hist_quantiles_accept_an_iterator():
+    edges = np.linspace(-1.0, 1.0, 5)
+    hist = (np.array([0, 0]), np.array([1, 2]), np.array([3, 1]))
+    from_tuple = _hist_quantiles(*hist, 1, edges, (0.5, 0.9))
+    from_iter = _hist_quantiles(*hist, 1, edges, iter([0.5, 0.9]))
+    assert not np.isnan(from_iter).any()
+    np.testing.assert_array_equal(from_iter, from_tuple)
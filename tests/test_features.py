@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.features import add_features
+
+
+def _panel(rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=["geo", "year", "unemp_rate", "gdp"])
+    df["geo"] = df["geo"].astype("category")
+    df["period"] = df["year"]
+    return df
+
+
+def test_lags_and_target_match_exact_years_across_a_gap():
+    # ITF3 has no 2020 observation
+    feat = add_features(
+        _panel(
+            [
+                ("ITC1", 2019, 5.0, 100.0),
+                ("ITC1", 2020, 6.0, 110.0),
+                ("ITC1", 2021, 7.0, 121.0),
+                ("ITF3", 2018, 18.0, 50.0),
+                ("ITF3", 2019, 19.0, 55.0),
+                ("ITF3", 2021, 17.0, 60.0),
+            ]
+        )
+    )
+    itf3 = feat[feat["geo"] == "ITF3"].set_index("year")
+
+    # 2021 must not use 2019 as "last year", and 2019's target is not 2021's value
+    assert np.isnan(itf3.loc[2021, "unemp_rate_lag1"])
+    assert np.isnan(itf3.loc[2021, "gdp_yoy_pct"])
+    assert np.isnan(itf3.loc[2019, "target_unemp_next_year"])
+    assert itf3.loc[2019, "unemp_rate_lag1"] == 18.0
+    assert itf3.loc[2018, "target_unemp_next_year"] == 19.0
+
+    # regions without gaps behave like a shift within the region
+    itc1 = feat[feat["geo"] == "ITC1"].set_index("year")
+    assert itc1["unemp_rate_lag1"].tolist()[1:] == [5.0, 6.0]
+    assert itc1["target_unemp_next_year"].tolist()[:2] == [6.0, 7.0]
+    assert itc1.loc[2021, "gdp_yoy_pct"] == np.float32(10.0)
+
+
+def test_quarterly_target_is_one_year_ahead():
+    quarters = [(2020 * 4 + q, 5.0 + q) for q in range(8)]
+    df = pd.DataFrame(
+        {
+            "geo": pd.Categorical(["ITC1"] * len(quarters)),
+            "year": [p // 4 for p, _ in quarters],
+            "period": [p for p, _ in quarters],
+            "unemp_rate": [v for _, v in quarters],
+            "gdp": 100.0,
+        }
+    )
+    feat = add_features(df, freq="Q")
+
+    assert feat["season"].tolist() == [0, 1, 2, 3] * 2
+    assert feat["unemp_rate_lag1"].tolist()[1:] == [5.0 + q for q in range(7)]
+    assert feat["target_unemp_next_year"].tolist()[:4] == [9.0, 10.0, 11.0, 12.0]
+    assert feat["target_unemp_next_year"].isna().sum() == 4
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import run_pipeline
+from src.features import add_features
+from src.schema import FEATURE_DTYPES, PANEL_DTYPES, read_table
+import src.build_dataset as build_dataset
+
+
+REGIONS = {"ITC1": "Piemonte", "ITC4": "Lombardia", "ITF3": "Campania",
+           "ITF4": "Puglia", "ITG1": "Sicilia", "ITH3": "Veneto"}
+YEARS = list(range(2008, 2023))
+VINTAGES = [f"2026-0{m}-01T09:00:00Z" for m in range(1, 10)]
+
+
+def _tidy(dims: dict, values: dict) -> pd.DataFrame:
+    """Frame shaped like jsonstat_to_df: <dim>, <dim>_name per dimension, value."""
+    rows = []
+    for (geo, year), v in values.items():
+        codes = {**dims, "geo": geo, "time": str(year)}
+        rows.append({**codes, **{f"{c}_name": code for c, code in codes.items()}, "value": v})
+    df = pd.DataFrame(rows)
+    df["geo_name"] = df["geo"].map(REGIONS)
+    return df
+
+
+def make_tables(revise: dict | None = None) -> dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(0)
+    unemp = {(g, y): round(float(rng.uniform(3, 20)), 1) for g in REGIONS for y in YEARS}
+    gdp = {(g, y): round(float(rng.uniform(2e4, 4e5)), 1) for g in REGIONS for y in YEARS}
+    unemp.update(revise or {})
+    return {
+        "tgs00010": _tidy({"freq": "A", "unit": "PC"}, unemp),
+        "nama_10r_2gdp": _tidy({"freq": "A", "unit": "MIO_EUR", "na_item": "B1GQ"}, gdp),
+    }
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """run_pipeline with every directory under tmp_path and an offline Eurostat."""
+    for name in ("RAW_DIR", "STORE_DIR", "SNAPSHOT_DIR", "PROCESSED_DIR", "MODELS_DIR"):
+        monkeypatch.setattr(run_pipeline, name, tmp_path / name.lower())
+    monkeypatch.setattr(run_pipeline, "PANEL_PATH", tmp_path / "processed_dir" / "regional_panel.csv")
+    monkeypatch.setattr(
+        run_pipeline, "FEATURES_PATH", tmp_path / "processed_dir" / "regional_panel_features.csv"
+    )
+    monkeypatch.setattr(run_pipeline, "CUBE_PATH", tmp_path / "models_dir" / "eval_cube.npz")
+    monkeypatch.setattr(run_pipeline, "SOURCES_PATH", tmp_path / "processed_dir" / "sources.json")
+
+    vintages = iter(VINTAGES)
+    monkeypatch.setattr(build_dataset, "new_vintage", lambda: next(vintages))
+
+    state = {"tables": make_tables()}
+    monkeypatch.setattr(build_dataset, "fetch_dataset", lambda ds, row_filter=None: state["tables"][ds.code])
+    return state
+
+
+def panel_values() -> dict:
+    panel = pd.read_csv(run_pipeline.PANEL_PATH)
+    return {(g, y): v for g, y, v in zip(panel["geo"], panel["year"], panel["unemp_rate"])}
+
+
+def test_build_as_of_does_not_touch_latest_raw(pipeline):
+    run_pipeline.main(["fetch"])
+    pipeline["tables"] = make_tables(revise={("ITF3", 2022): 99.9})
+    run_pipeline.main(["fetch"])
+    raw_before = (run_pipeline.RAW_DIR / "unemployment_raw.csv").read_bytes()
+
+    run_pipeline.main(["build", "--as-of", VINTAGES[0]])
+    assert panel_values()[("ITF3", 2022)] != 99.9
+    assert (run_pipeline.RAW_DIR / "unemployment_raw.csv").read_bytes() == raw_before
+    assert (run_pipeline.SNAPSHOT_DIR / VINTAGES[0].replace(":", "") / "unemployment_raw.csv").exists()
+
+    # a plain build afterwards uses the latest data again
+    run_pipeline.main(["build"])
+    assert panel_values()[("ITF3", 2022)] == 99.9
+
+
+def test_build_as_of_before_first_vintage_lists_vintages(pipeline):
+    run_pipeline.main(["fetch"])
+    with pytest.raises(SystemExit, match=VINTAGES[0]):
+        run_pipeline.main(["build", "--as-of", "2020-01-01"])
+
+
+def built_vintages() -> set:
+    return {src["vintage"] for src in run_pipeline._read_sources().values()}
+
+
+def test_refresh_after_fetch_builds_everything(pipeline, capsys):
+    run_pipeline.main(["fetch"])
+    run_pipeline.main(["refresh"])
+
+    assert "nothing to recompute" not in capsys.readouterr().out
+    for path in (run_pipeline.PANEL_PATH, run_pipeline.FEATURES_PATH, run_pipeline.CUBE_PATH):
+        assert path.exists()
+    assert (run_pipeline.MODELS_DIR / "forecast.csv").exists()
+    assert built_vintages() == {VINTAGES[0]}
+
+
+def test_refresh_without_changes_is_a_no_op(pipeline, capsys):
+    run_pipeline.main(["refresh"])
+    metrics = (run_pipeline.MODELS_DIR / "metrics.json").stat().st_mtime_ns
+    capsys.readouterr()
+
+    run_pipeline.main(["refresh"])
+    assert "nothing to recompute" in capsys.readouterr().out
+    assert (run_pipeline.MODELS_DIR / "metrics.json").stat().st_mtime_ns == metrics
+
+
+def test_refresh_rebuilds_outputs_of_an_old_vintage(pipeline):
+    run_pipeline.main(["refresh"])
+    pipeline["tables"] = make_tables(revise={("ITF3", 2022): 99.9, ("ITC1", 2015): 1.5})
+    run_pipeline.main(["fetch"])
+    run_pipeline.main(["build", "--as-of", VINTAGES[0]])
+    run_pipeline.main(["features"])
+    run_pipeline.main(["train"])
+
+    # no new data, but the outputs are from the first vintage
+    run_pipeline.main(["refresh"])
+    assert panel_values()[("ITF3", 2022)] == 99.9
+    assert panel_values()[("ITC1", 2015)] == 1.5
+    assert built_vintages() == {VINTAGES[1]}
+
+
+def test_incremental_refresh_matches_full_features(pipeline, capsys):
+    run_pipeline.main(["refresh"])
+    pipeline["tables"] = make_tables(revise={("ITG1", 2020): 42.0})
+    capsys.readouterr()
+
+    run_pipeline.main(["refresh"])
+    assert "1 regions changed" in capsys.readouterr().out
+    assert built_vintages() == {VINTAGES[1]}
+
+    feat, _ = read_table(run_pipeline.FEATURES_PATH, FEATURE_DTYPES)
+    panel, _ = read_table(run_pipeline.PANEL_PATH, PANEL_DTYPES)
+    pd.testing.assert_frame_equal(feat, add_features(panel))
+
+
+@pytest.mark.parametrize("output", ["eval_cube.npz", "forecast.csv"])
+def test_refresh_restores_missing_downstream_outputs(pipeline, capsys, output):
+    run_pipeline.main(["refresh"])
+    (run_pipeline.MODELS_DIR / output).unlink()
+    capsys.readouterr()
+
+    run_pipeline.main(["refresh"])
+    assert "nothing to recompute" not in capsys.readouterr().out
+    assert (run_pipeline.MODELS_DIR / output).exists()
+
+
+def test_refresh_rebuilds_a_stale_forecast(pipeline, capsys):
+    run_pipeline.main(["refresh"])
+    pipeline["tables"] = make_tables(revise={("ITC4", 2022): 30.0})
+    run_pipeline.main(["fetch"])
+    for step in ("build", "features", "train", "evaluate"):
+        run_pipeline.main([step])
+    # forecast.csv is still from the first vintage
+    capsys.readouterr()
+
+    run_pipeline.main(["refresh"])
+    assert "nothing to recompute" not in capsys.readouterr().out
+    assert run_pipeline._read_sources()["forecast"]["vintage"] == VINTAGES[1]
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.features as features
+import src.train_models as train_models
+from src.schema import FEATURE_DTYPES, PANEL_DTYPES, PREDICTION_DTYPES, apply_schema
+
+# The compact schema must not change results beyond float32 rounding. Random Forest is
+# not compared: float32 targets change tie-breaking between equal splits (~0.2% on metrics).
+FEATURE_RTOL = 1e-6
+PRED_ATOL = 1e-5  # percentage points of unemployment (observed ~1e-6)
+
+
+def _wide(dtypes: dict) -> dict:
+    """The same schema with every measure float64 and every integer int64."""
+    return {
+        c: "float64" if t.startswith("float") else "int64" if t.startswith("int") else t
+        for c, t in dtypes.items()
+    }
+
+
+@pytest.fixture
+def panel() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    geos = [f"ITC{i}" for i in range(1, 9)]
+    years = np.arange(2003, 2023)
+    df = pd.DataFrame([(g, y) for g in geos for y in years], columns=["geo", "year"])
+    df["period"] = df["year"]
+    walk = rng.normal(0, 0.6, len(df)).reshape(len(geos), -1).cumsum(axis=1)
+    df["unemp_rate"] = (rng.uniform(4, 18, len(geos))[:, None] + walk).ravel().round(1)
+    df["gdp"] = (rng.uniform(3e4, 4e5, len(geos))[:, None] * 1.02 ** (years - 2003)).ravel().round(2)
+    return df
+
+
+def _run(panel: pd.DataFrame, out_dir, monkeypatch, compact: bool):
+    if not compact:
+        monkeypatch.setattr(features, "FEATURE_DTYPES", _wide(FEATURE_DTYPES))
+        monkeypatch.setattr(train_models, "PREDICTION_DTYPES", _wide(PREDICTION_DTYPES))
+    dtypes = PANEL_DTYPES if compact else _wide(PANEL_DTYPES)
+    feat = features.add_features(apply_schema(panel, dtypes))
+    preds, metrics = train_models.train_time_aware(feat, out_dir)
+    monkeypatch.undo()
+    return feat, preds, metrics
+
+
+def test_compact_schema_matches_float64(panel, tmp_path, monkeypatch):
+    feat32, preds32, metrics32 = _run(panel, tmp_path / "compact", monkeypatch, compact=True)
+    feat64, preds64, metrics64 = _run(panel, tmp_path / "wide", monkeypatch, compact=False)
+
+    assert feat32["unemp_rate"].dtype == "float32" and feat32["year"].dtype == "int16"
+    assert feat64["unemp_rate"].dtype == "float64"
+
+    measures = ["unemp_rate", "gdp", "unemp_rate_lag1", "gdp_lag1", "gdp_yoy_pct", "target_unemp_next_year"]
+    for col in measures:
+        np.testing.assert_allclose(
+            feat32[col].to_numpy(dtype=float), feat64[col].to_numpy(), rtol=FEATURE_RTOL, err_msg=col
+        )
+
+    ridge32 = preds32[preds32["model"] == "ridge"]
+    ridge64 = preds64[preds64["model"] == "ridge"]
+    np.testing.assert_array_equal(ridge32["geo"].astype(str), ridge64["geo"].astype(str))
+    np.testing.assert_allclose(
+        ridge32["y_pred_next_year"].to_numpy(dtype=float),
+        ridge64["y_pred_next_year"].to_numpy(),
+        atol=PRED_ATOL,
+    )
+    assert metrics32["ridge"]["RMSE"] == pytest.approx(metrics64["ridge"]["RMSE"], abs=PRED_ATOL)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.bench_startup import _IMPORT_PROBE, _PROBE, _run
+
+BUDGET = 1.0  # seconds, best of 3 (same as benchmarks/bench_startup.py)
+HEAVY = {"pandas", "sklearn", "requests"}
+
+
+@pytest.mark.parametrize("argv", ["--help", "report --help", "fetch --help", "build --help", "report"])
+def test_cli_paths_do_not_load_heavy_modules(argv):
+    _, loaded = _run(_PROBE.format(argv=argv.split()), repeat=1)
+    assert not HEAVY & loaded
+
+
+@pytest.mark.parametrize(
+    "label, code",
+    [
+        ("run_pipeline.py build --help", _PROBE.format(argv=["build", "--help"])),
+        ("import src.build_dataset", _IMPORT_PROBE.format(module="src.build_dataset")),
+    ],
+)
+def test_startup_within_budget(label, code):
+    secs, _ = _run(code, repeat=3)
+    assert secs < BUDGET, f"{label} took {secs:.3f}s (budget {BUDGET}s)"
+
+
+@pytest.mark.parametrize("module", ["src.build_dataset", "src.eurostat_api"])
+def test_data_modules_do_not_load_sklearn_or_requests(module):
+    _, loaded = _run(_IMPORT_PROBE.format(module=module), repeat=1)
+    assert not {"sklearn", "requests"} & loaded
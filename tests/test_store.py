@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from src.store import append_observations, read_observations
+
+
+def _obs(rows, cols=("unit", "geo", "time")) -> pd.DataFrame:
+    """Tidy frame like jsonstat_to_df: code columns, one *_name label, value."""
+    df = pd.DataFrame(rows, columns=["geo", "time", "value"])
+    df["unit"] = "PC"
+    df["geo_name"] = df["geo"].map({"ITC1": "Piemonte", "ITF3": "Campania"})
+    return df[list(cols) + ["geo_name", "value"]]
+
+
+V1, V2, V3 = "2026-01-31T10:00:00Z", "2026-02-28T10:00:00Z", "2026-03-31T10:00:00Z"
+
+
+def test_append_records_only_new_and_revised(tmp_path):
+    first = append_observations(tmp_path, "ds", _obs([("ITC1", "2020", 6.0), ("ITF3", "2020", 18.1)]), V1)
+    assert first["change"].tolist() == ["new", "new"]
+
+    delta = append_observations(
+        tmp_path,
+        "ds",
+        _obs([("ITC1", "2020", 6.0), ("ITF3", "2020", 17.9), ("ITC1", "2021", 5.7)]),
+        V2,
+    )
+    delta = delta.set_index(["geo", "time"])
+    assert delta["change"].to_dict() == {("ITF3", "2020"): "revised", ("ITC1", "2021"): "new"}
+    assert delta.loc[("ITF3", "2020"), "previous_value"] == pytest.approx(18.1)
+
+    # nothing changed -> nothing appended
+    again = append_observations(tmp_path, "ds", _obs([("ITC1", "2020", 6.0)]), V3)
+    assert again.empty
+    assert len(pd.read_csv(tmp_path / "ds.csv")) == 4
+
+
+def test_read_observations_as_of(tmp_path):
+    append_observations(tmp_path, "ds", _obs([("ITF3", "2020", 18.1)]), V1)
+    append_observations(tmp_path, "ds", _obs([("ITF3", "2020", 17.9), ("ITC1", "2020", 6.0)]), V2)
+
+    def values(as_of):
+        df = read_observations(tmp_path, "ds", as_of=as_of)
+        return dict(zip(df["geo"].astype(str), df["value"]))
+
+    assert values(None) == {"ITF3": 17.9, "ITC1": 6.0}
+    assert values(V1) == {"ITF3": 18.1}
+    assert values("2026-02-01") == {"ITF3": 18.1}  # plain date = midnight UTC
+    assert values("2026-01-01") == {}
+
+
+def test_append_with_different_column_order(tmp_path):
+    append_observations(tmp_path, "ds", _obs([("ITC1", "2020", 6.0)], cols=("unit", "geo", "time")), V1)
+    append_observations(tmp_path, "ds", _obs([("ITC1", "2021", 5.7)], cols=("geo", "time", "unit")), V2)
+
+    log = pd.read_csv(tmp_path / "ds.csv", dtype=str)
+    assert (log["unit"] == "PC").all()
+    assert log["geo"].tolist() == ["ITC1", "ITC1"]
+
+    latest = read_observations(tmp_path, "ds")
+    assert len(latest) == 2
+    # a reordered refetch of the same values is not a revision
+    again = append_observations(
+        tmp_path, "ds", _obs([("ITC1", "2020", 6.0), ("ITC1", "2021", 5.7)], cols=("time", "geo", "unit")), V3
+    )
+    assert again.empty
+
+
+def test_append_rejects_different_key_columns(tmp_path):
+    append_observations(tmp_path, "ds", _obs([("ITC1", "2020", 6.0)]), V1)
+    other = _obs([("ITC1", "2021", 5.7)]).drop(columns="unit")
+    with pytest.raises(ValueError, match="key columns"):
+        append_observations(tmp_path, "ds", other, V2)